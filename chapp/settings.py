@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,7 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'pms.tenancy.middleware.PropertyMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -63,6 +65,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'pms.tenancy.context_processors.properties',
             ],
         },
     },
@@ -80,6 +83,23 @@ DATABASES = {
     }
 }
 
+# Hotels can keep their data in their own database: add the alias here, run
+# "python manage.py migrate --database <alias>" and set it as the property database.
+
+PMS_PROPERTY_DATABASES = {
+    # 'hotel_b': BASE_DIR / 'hotel_b.sqlite3',
+}
+for alias, name in PMS_PROPERTY_DATABASES.items():
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+    }
+
+DATABASE_ROUTERS = ['pms.tenancy.router.PropertyRouter']
+
+# Slug of the property used when the request does not choose one, None uses the first one
+PMS_DEFAULT_PROPERTY = None
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -116,9 +136,43 @@ STATIC_URL = 'static/'
 
 STATICFILES_DIRS = [BASE_DIR / 'pms/statics']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# hashed file names are served by WhiteNoise with "max-age=315360000, public, immutable",
+# .gz and .br copies are written by collectstatic (brotli needs the Brotli package)
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# gzip bytes allowed per bundle, checked by python manage.py build_assets --check
+PMS_ASSET_BUDGET = {
+    'app.css': 1024,
+    'app.js': 1024,
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Search rate limits per client (session or IP), as "requests/period" with period s, m, h or d
+
+PMS_RATE_LIMITS = {
+    'room_search': '30/m',
+    'booking_search': '60/m',
+    # opening a booking form holds the room, see PMS_HOLD_MINUTES
+    'booking_form': '10/m',
+}
+# Every client is also limited per IP address, at this many times the rate to allow shared addresses
+PMS_RATE_LIMIT_IP_FACTOR = 4
+# Path of a SQLite file to share the rate limits between workers, None keeps them per process
+PMS_RATE_LIMIT_STORE = None
+# Reverse proxies in front of the app whose X-Forwarded-For is trusted to identify the client,
+# Heroku (which sets DYNO) has its router, 0 uses REMOTE_ADDR
+PMS_TRUSTED_PROXIES = 1 if 'DYNO' in os.environ else 0
+
+# minutes a room stays held for the visitor filling the booking form
+PMS_HOLD_MINUTES = 10
+
+# Emails are sent by the background job worker (python manage.py run_jobs)
+
+DEFAULT_FROM_EMAIL = 'reservas@chapp-inn.com'
+if DEBUG:
+    EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+# Scheme and host used for the links in the emails
+PMS_SITE_URL = 'http://localhost:8000' if DEBUG else 'https://chapp-inn.herokuapp.com'
@@ -0,0 +1,66 @@
+"""
+Production settings for chapp: the base settings without the apps the
+booking engine does not use at runtime, with cached and pre-warmed
+templates so new workers answer their first request quickly.
+
+Use with DJANGO_SETTINGS_MODULE=chapp.settings_production and check the
+boot time with "python manage.py startup_benchmark".
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', SECRET_KEY)
+
+DEBUG = False
+PMS_SITE_URL = 'https://chapp-inn.herokuapp.com'
+
+# admin, auth and messages are only needed by the admin site
+INSTALLED_APPS = [
+    'django.contrib.sessions',
+    'whitenoise',
+    'django.contrib.staticfiles',
+    'pms.apps.PmsConfig'
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'pms.tenancy.middleware.PropertyMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'pms.tenancy.context_processors.properties',
+            ],
+            # templates are compiled once per worker, see PMS_WARM_TEMPLATES
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+# compile the templates and import the views when the worker boots (chapp/wsgi.py)
+PMS_WARM_TEMPLATES = True
+
+# milliseconds a new worker may take, checked by "python manage.py startup_benchmark --check"
+PMS_STARTUP_BUDGET = {
+    'setup': 400,
+    'warmup': 300,
+    'first_request': 150,
+}
@@ -1,5 +1,5 @@
 from django.contrib import admin
 
-from .models import Room, Booking, Customer, Room_type
+from .models import Room, Booking, Customer, Room_type, Job, Property, WaitlistEntry, InventoryHold
 
-admin.site.register([Room, Booking, Customer, Room_type])
+admin.site.register([Room, Booking, Customer, Room_type, Job, Property, WaitlistEntry, InventoryHold])
@@ -0,0 +1,79 @@
+import gzip
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, WhiteNoise skips .br files without it as well
+    brotli = None
+
+# source directory of the app statics, the bundles are written to its dist folder
+STATICS = Path(__file__).resolve().parent.parent / "statics"
+DIST = "dist"
+
+# bundle name and the source files concatenated into it, in order
+BUNDLES = {
+    "app.css": ["css/style.css"],
+    "app.js": ["js/search_room.js"],
+}
+
+_inline = {}
+
+
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    # only the space after a colon, "a :hover" and "a:hover" are different selectors
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text):
+    # conservative: only whole line comments and indentation are removed, strings are never touched
+    lines = (line.strip() for line in text.splitlines())
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+def minify(name, text):
+    return minify_css(text) if name.endswith(".css") else minify_js(text)
+
+
+def sources(name):
+    return [STATICS / path for path in BUNDLES[name]]
+
+
+def render(name):
+    # concatenated and minified content of a bundle
+    parts = [minify(name, path.read_text()) for path in sources(name)]
+    return ("\n" if name.endswith(".css") else ";\n").join(parts) + "\n"
+
+
+def sizes(data):
+    # raw, gzip and brotli bytes of the content, brotli is None when it is not installed
+    compressed = brotli.compress(data) if brotli is not None else None
+    return len(data), len(gzip.compress(data, 9)), len(compressed) if compressed is not None else None
+
+
+def build():
+    # writes every bundle to statics/dist and returns the size report per bundle
+    output = STATICS / DIST
+    output.mkdir(exist_ok=True)
+    report = {}
+    for name in BUNDLES:
+        content = render(name)
+        (output / name).write_text(content)
+        source = sum(path.stat().st_size for path in sources(name))
+        report[name] = (source, *sizes(content.encode()))
+    _inline.clear()
+    return report
+
+
+def inline(name):
+    # content of a built bundle to be inlined in a page, read once per process outside DEBUG
+    if settings.DEBUG or name not in _inline:
+        path = STATICS / DIST / name
+        _inline[name] = path.read_text() if path.exists() else render(name)
+    return _inline[name]
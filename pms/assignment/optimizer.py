@@ -0,0 +1,66 @@
+from bisect import bisect_left, insort
+
+# Stays are (checkin, checkout) day numbers. As in RoomSearchView a stay blocks
+# its room from the checkin day to the checkout day, both included, so two stays
+# fit in the same room only when one checks out before the other checks in.
+
+# free gaps shorter than this (in days) cannot be sold and count as fragmentation
+MIN_GAP = 2
+
+
+def gaps(stays):
+    # free days between consecutive stays of one room
+    stays = sorted(stays)
+    return [nxt[0] - prev[1] - 1 for prev, nxt in zip(stays, stays[1:])]
+
+
+def orphan_nights(rooms):
+    # rooms: {room: [stays]}, number of free days that sit in gaps too short to sell
+    return sum(gap for stays in rooms.values() for gap in gaps(stays) if 0 < gap < MIN_GAP)
+
+
+def score(checkin, checkout, prev_checkout, next_checkin):
+    # lower is better: first avoid leaving unsellable gaps, then pick the tightest free window
+    before = checkin - prev_checkout - 1 if prev_checkout is not None else None
+    after = next_checkin - checkout - 1 if next_checkin is not None else None
+    orphans = sum(gap for gap in (before, after) if gap is not None and 0 < gap < MIN_GAP)
+    # an open side (no booking before or after) is the loosest possible fit
+    window = sum(gap if gap is not None else 10 ** 6 for gap in (before, after))
+    return orphans, window
+
+
+def best_fit(checkin, checkout, candidates):
+    # candidates: (room, previous checkout or None, next checkin or None) of free rooms
+    best = None
+    for room, prev_checkout, next_checkin in candidates:
+        key = score(checkin, checkout, prev_checkout, next_checkin)
+        if best is None or key < best[0]:
+            best = (key, room)
+    return best[1] if best else None
+
+
+def reassign(fixed, movable):
+    # fixed: {room: [stays]} that cannot move (guests already in the hotel)
+    # movable: {booking: stay}; returns {booking: room} or None when the stays do not fit.
+    # Stays are placed by checkin in the room that became free the latest before
+    # the checkin without leaving an unsellable gap (best fit), which packs them
+    # and leaves long free runs. A room is only offered once its last stay, fixed
+    # or placed, ends before the checkin (a guest in-house past that day keeps the
+    # room out of the search), so no room ever gets two overlapping stays.
+    ends = []
+    for room, stays in fixed.items():
+        insort(ends, (max((checkout for _, checkout in stays), default=float("-inf")), room))
+    assignment = {}
+    for booking, (checkin, checkout) in sorted(movable.items(), key=lambda item: item[1]):
+        i = bisect_left(ends, (checkin, )) - 1
+        if i < 0:
+            return None
+        if ends[i][0] != checkin - 1:
+            # the latest room that keeps a sellable gap, if any
+            j = bisect_left(ends, (checkin - MIN_GAP, )) - 1
+            if j >= 0:
+                i = j
+        _, room = ends.pop(i)
+        assignment[booking] = room
+        insort(ends, (checkout, room))
+    return assignment
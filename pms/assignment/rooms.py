@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models import Max, Min, Q
+
+from ..models import Booking, Room
+from ..tenancy import context
+from . import optimizer
+
+
+def recommend(rooms, checkin, checkout):
+    # rooms: queryset of free rooms, returns the best fitting room id per room type
+    active = Q(booking__state=Booking.NEW)
+    rooms = (rooms
+             .annotate(prev_checkout=Max('booking__checkout', filter=active & Q(booking__checkout__lt=checkin)),
+                       next_checkin=Min('booking__checkin', filter=active & Q(booking__checkin__gt=checkout)))
+             .values_list('id', 'room_type', 'prev_checkout', 'next_checkin')
+             .order_by('name'))
+    candidates = {}
+    for room, room_type, prev_checkout, next_checkin in rooms:
+        candidates.setdefault(room_type, []).append((
+            room,
+            prev_checkout.toordinal() if prev_checkout else None,
+            next_checkin.toordinal() if next_checkin else None,
+        ))
+    return {room_type: optimizer.best_fit(checkin.toordinal(), checkout.toordinal(), options)
+            for room_type, options in candidates.items()}
+
+
+def reoptimize(room_type, today, apply=False):
+    # repacks the future bookings of a room type, returns (bookings moved, orphan nights before, after)
+    with transaction.atomic(using=context.database()):
+        room_ids = list(Room.objects.filter(room_type=room_type).values_list('id', flat=True))
+        bookings = (Booking.objects
+                    .select_for_update()
+                    .filter(state=Booking.NEW, room__room_type=room_type, checkout__gte=today)
+                    .values_list('id', 'room', 'checkin', 'checkout'))
+        fixed = {room: [] for room in room_ids}
+        current = {room: [] for room in room_ids}
+        movable, rooms = {}, {}
+        for booking, room, checkin, checkout in bookings:
+            stay = (checkin.toordinal(), checkout.toordinal())
+            current[room].append(stay)
+            if checkin <= today:
+                fixed[room].append(stay)
+            else:
+                movable[booking] = stay
+                rooms[booking] = room
+
+        assignment = optimizer.reassign(fixed, movable)
+        if assignment is None:
+            orphans = optimizer.orphan_nights(current)
+            return 0, orphans, orphans
+        packed = {room: list(stays) for room, stays in fixed.items()}
+        for booking, room in assignment.items():
+            packed[room].append(movable[booking])
+
+        before, after = optimizer.orphan_nights(current), optimizer.orphan_nights(packed)
+        if after >= before:
+            # nothing to gain, leave the guests in their rooms
+            return 0, before, before
+
+        moved = {booking: room for booking, room in assignment.items() if rooms[booking] != room}
+        if apply:
+            by_room = {}
+            for booking, room in moved.items():
+                by_room.setdefault(room, []).append(booking)
+            for room, ids in by_room.items():
+                Booking.objects.filter(id__in=ids).update(room=room)
+        return len(moved), before, after
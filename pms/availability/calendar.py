@@ -0,0 +1,121 @@
+import struct
+from datetime import timedelta
+
+from ..holds import holds
+from ..models import Room, Room_type
+from .rooms import blocking_bookings
+
+# binary format: magic, first night (YYYY-MM-DD), nights, rooms,
+# then for every room its id followed by one bit per night (1 = occupied)
+MAGIC = b"PMSC"
+HEADER = struct.Struct("<4s10sHI")
+ROOM = struct.Struct("<I")
+
+
+class Calendar:
+    def __init__(self, start, nights, room_types, rooms, occupancy):
+        self.start = start
+        self.nights = nights
+        # [(id, name, price)]
+        self.room_types = room_types
+        # [(id, name, room_type_id)]
+        self.rooms = rooms
+        # one bytearray per room, 1 for every occupied night
+        self.occupancy = occupancy
+
+    def dates(self):
+        return [self.start + timedelta(days=i) for i in range(self.nights)]
+
+    def free_by_type(self):
+        # {room_type_id: [free rooms per night]}
+        free = {room_type: [0] * self.nights for room_type, _, _ in self.room_types}
+        for (_, _, room_type), occupied in zip(self.rooms, self.occupancy):
+            counts = free.get(room_type)
+            if counts is None:
+                continue
+            for night, busy in enumerate(occupied):
+                if not busy:
+                    counts[night] += 1
+        return free
+
+    def as_dict(self):
+        free = self.free_by_type()
+        rooms_per_type = {}
+        for _, _, room_type in self.rooms:
+            rooms_per_type[room_type] = rooms_per_type.get(room_type, 0) + 1
+        return {
+            "start": self.start.isoformat(),
+            "nights": self.nights,
+            "dates": [day.isoformat() for day in self.dates()],
+            "room_types": [
+                {"id": room_type, "name": name, "price": price,
+                 "rooms": rooms_per_type.get(room_type, 0), "free": free[room_type]}
+                for room_type, name, price in self.room_types
+            ],
+            "rooms": [
+                {"id": room, "name": name, "room_type": room_type,
+                 "occupied": "".join("1" if busy else "0" for busy in occupied)}
+                for (room, name, room_type), occupied in zip(self.rooms, self.occupancy)
+            ],
+        }
+
+    def csv_rows(self):
+        # one row per room type with the free rooms and one row per room with its occupancy
+        yield ["kind", "id", "name", "price/room_type"] + [day.isoformat() for day in self.dates()]
+        free = self.free_by_type()
+        for room_type, name, price in self.room_types:
+            yield ["free", room_type, name, price] + free[room_type]
+        for (room, name, room_type), occupied in zip(self.rooms, self.occupancy):
+            yield ["room", room, name, room_type] + list(occupied)
+
+    def as_bytes(self):
+        chunks = [HEADER.pack(MAGIC, self.start.isoformat().encode(), self.nights, len(self.rooms))]
+        for (room, _, _), occupied in zip(self.rooms, self.occupancy):
+            bits = 0
+            for night, busy in enumerate(occupied):
+                if busy:
+                    bits |= 1 << night
+            chunks.append(ROOM.pack(room))
+            chunks.append(bits.to_bytes((self.nights + 7) // 8, "little"))
+        return b"".join(chunks)
+
+
+def build(start, end, room_type=None):
+    # availability of every night from start to end (both included), from one bookings and one holds query
+    nights = (end - start).days + 1
+    types = Room_type.objects.order_by("max_guests", "id")
+    rooms = Room.objects.order_by("room_type__max_guests", "name")
+    if room_type is not None:
+        types = types.filter(id=room_type)
+        rooms = rooms.filter(room_type=room_type)
+    room_types = list(types.values_list("id", "name", "price"))
+    rooms = list(rooms.values_list("id", "name", "room_type"))
+
+    # difference array per room: +1 on the checkin night, -1 after the checkout night.
+    # The checkout night blocks the room too, the same rule as blocking_bookings and the room search
+    index = {room: i for i, (room, _, _) in enumerate(rooms)}
+    diffs = [[0] * (nights + 1) for _ in rooms]
+    bookings = blocking_bookings(start, end).filter(room__isnull=False).values_list("room", "checkin", "checkout")
+    # rooms held by a guest filling the booking form are not free either
+    held = holds.blocking(start, end).values_list("room", "checkin", "checkout")
+    if room_type is not None:
+        bookings = bookings.filter(room__room_type=room_type)
+        held = held.filter(room__room_type=room_type)
+    for stays in (bookings, held):
+        for room, checkin, checkout in stays.iterator():
+            if room not in index:
+                continue
+            diff = diffs[index[room]]
+            diff[max((checkin - start).days, 0)] += 1
+            diff[min((checkout - start).days + 1, nights)] -= 1
+
+    occupancy = []
+    for diff in diffs:
+        occupied = bytearray(nights)
+        running = 0
+        for night in range(nights):
+            running += diff[night]
+            if running > 0:
+                occupied[night] = 1
+        occupancy.append(occupied)
+    return Calendar(start, nights, room_types, rooms, occupancy)
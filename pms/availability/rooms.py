@@ -0,0 +1,24 @@
+from django.db.models import Count
+
+from ..holds import holds
+from ..models import Booking, Room
+
+
+def blocking_bookings(checkin, checkout):
+    # active bookings that touch the given dates
+    return Booking.objects.filter(checkin__lte=checkout, checkout__gte=checkin, state=Booking.NEW)
+
+
+def free_rooms(checkin, checkout, **filters):
+    # rooms without an active booking or hold between the given dates, checked with subqueries
+    busy = blocking_bookings(checkin, checkout).filter(room__isnull=False).values("room_id")
+    held = holds.blocking(checkin, checkout).values("room_id")
+    return Room.objects.filter(**filters).exclude(id__in=busy).exclude(id__in=held)
+
+
+def free_by_type(checkin, checkout, **filters):
+    # number of free rooms per room type
+    return (free_rooms(checkin, checkout, **filters)
+            .values("room_type__name", "room_type")
+            .annotate(total=Count("room_type"))
+            .order_by("room_type__max_guests"))
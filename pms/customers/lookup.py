@@ -0,0 +1,27 @@
+from ..models import Customer
+from . import normalize
+
+
+def find(email, phone):
+    # returns the existing customer with the same email, the phone is only used when no email is given
+    key = normalize.email(email)
+    if key:
+        return Customer.objects.filter(email_normalized=key).order_by("id").first()
+    key = normalize.phone(phone)
+    if key:
+        return Customer.objects.filter(email_normalized="", phone_normalized=key).order_by("id").first()
+    return None
+
+
+def same_guest(customer, data):
+    # the booking form is public, a match is only reused when name and email agree too
+    return (customer.name.strip().casefold() == data["name"].strip().casefold()
+            and customer.email_normalized == normalize.email(data["email"]))
+
+
+def get_or_create(data):
+    # reuses a returning customer without touching their contact data, or creates a new one
+    customer = find(data["email"], data["phone"])
+    if customer is None or not same_guest(customer, data):
+        return Customer.objects.create(**data)
+    return customer
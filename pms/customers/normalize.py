@@ -0,0 +1,13 @@
+import re
+
+_non_digits = re.compile(r"\D")
+
+
+def email(value):
+    # canonical form used to find returning customers
+    return (value or "").strip().lower()
+
+
+def phone(value):
+    # keeps only the digits so "+34 600-123-456" and "34600123456" match
+    return _non_digits.sub("", value or "")
@@ -0,0 +1,122 @@
+import sys
+from array import array
+from datetime import timedelta
+
+# days ahead that are forecasted
+HORIZON = 90
+# lead times (days between booking and night) above this share the last bucket
+MAX_LEAD = 365
+
+
+class Pace:
+    # booking pace of a room type built from completed stays
+    def __init__(self):
+        self.diff = array("q", bytes(8 * (MAX_LEAD + 1)))
+        self.over = 0
+        self.nights = 0
+        self.revenue = 0.0
+        self.booked = None
+
+    @classmethod
+    def load(cls, diff, over, nights, revenue):
+        # a pace stored with dump(), to keep folding stays into it
+        pace = cls()
+        pace.diff = array("q")
+        pace.diff.frombytes(bytes(diff))
+        if sys.byteorder == "big":
+            pace.diff.byteswap()
+        pace.over, pace.nights, pace.revenue = over, nights, revenue
+        return pace
+
+    def dump(self):
+        # the difference array as little endian bytes
+        diff = array("q", self.diff)
+        if sys.byteorder == "big":
+            diff.byteswap()
+        return diff.tobytes()
+
+    def add(self, lead, nights, total):
+        # a stay booked `lead` days before checkin covers the leads lead..lead+nights-1
+        lead = max(lead, 0)
+        end = lead + nights
+        if lead < MAX_LEAD:
+            self.diff[lead] += 1
+            self.diff[min(end, MAX_LEAD)] -= 1
+        self.over += max(end - max(lead, MAX_LEAD), 0)
+        self.nights += nights
+        self.revenue += total
+
+    def finish(self):
+        # booked[L] is the number of room-nights that were already on the books L days ahead
+        per_lead = array("q", bytes(8 * (MAX_LEAD + 1)))
+        running = 0
+        for lead in range(MAX_LEAD):
+            running += self.diff[lead]
+            per_lead[lead] = running
+        per_lead[MAX_LEAD] = self.over
+        self.booked = array("q", bytes(8 * (MAX_LEAD + 1)))
+        running = 0
+        for lead in range(MAX_LEAD, -1, -1):
+            running += per_lead[lead]
+            self.booked[lead] = running
+        return self
+
+    def pickup(self, lead):
+        # how much the room-nights on the books grow from `lead` days ahead until the stay
+        booked = self.booked[min(lead, MAX_LEAD)]
+        return self.nights / booked if booked else 1.0
+
+    def rate(self, default):
+        # average revenue per room-night
+        return self.revenue / self.nights if self.nights else default
+
+
+def curves(history, paces=None):
+    # history: (room_type, checkin, checkout, created date, total) of completed stays,
+    # folded into the given {room_type: Pace} when there are stored ones
+    paces = {} if paces is None else paces
+    for room_type, checkin, checkout, created, total in history:
+        nights = (checkout - checkin).days
+        if nights <= 0:
+            continue
+        pace = paces.get(room_type)
+        if pace is None:
+            pace = paces[room_type] = Pace()
+        pace.add((checkin - created).days, nights, total)
+    return {room_type: pace.finish() for room_type, pace in paces.items()}
+
+
+def on_books(bookings, today, horizon=HORIZON):
+    # bookings: (room_type, checkin, checkout) of active stays, returns room-nights per type and day
+    diffs = {}
+    for room_type, checkin, checkout in bookings:
+        diff = diffs.get(room_type)
+        if diff is None:
+            diff = diffs[room_type] = array("q", bytes(8 * (horizon + 1)))
+        start = max((checkin - today).days, 0)
+        end = min((checkout - today).days, horizon)
+        if start < end:
+            diff[start] += 1
+            diff[end] -= 1
+    result = {}
+    for room_type, diff in diffs.items():
+        running = 0
+        days = array("q", bytes(8 * horizon))
+        for day in range(horizon):
+            running += diff[day]
+            days[day] = running
+        result[room_type] = days
+    return result
+
+
+def forecast(room_types, paces, booked, today, horizon=HORIZON):
+    # room_types: (id, price, rooms), yields (room_type, date, on books, expected rooms, expected revenue)
+    for room_type, price, rooms in room_types:
+        pace = paces.get(room_type)
+        days = booked.get(room_type)
+        rate = pace.rate(price) if pace else price
+        for day in range(horizon):
+            current = days[day] if days else 0
+            expected = current * pace.pickup(day) if pace else current
+            expected = min(expected, rooms)
+            yield room_type, today + timedelta(days=day), current, expected, expected * rate
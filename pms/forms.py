@@ -1,8 +1,9 @@
-from datetime import datetime
+from datetime import date
 from django import forms
 from django.forms import ModelForm
 
-from .models import Booking, Customer
+from .models import Booking, Customer, Room, Room_type, WaitlistEntry
+from .waitlist.matcher import MAX_NIGHTS
 
 
 class RoomSearchForm(ModelForm):
@@ -13,12 +14,40 @@ class RoomSearchForm(ModelForm):
             "guests": "Huéspedes"
         }
         widgets = {
-            'checkin': forms.DateInput(attrs={'type': 'date', 'min': datetime.today().strftime('%Y-%m-%d')}),
-            'checkout': forms.DateInput(
-                attrs={'type': 'date', 'max': datetime.today().replace(month=12, day=31).strftime('%Y-%m-%d')}),
+            'checkin': forms.DateInput(attrs={'type': 'date'}),
+            'checkout': forms.DateInput(attrs={'type': 'date'}),
             'guests': forms.DateInput(attrs={'type': 'number', 'min': 1, 'max': 4}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # computed per form, a class level value would keep the date of the worker boot
+        today = date.today()
+        self.fields['checkin'].widget.attrs['min'] = today.isoformat()
+        self.fields['checkout'].widget.attrs['max'] = today.replace(month=12, day=31).isoformat()
+
+
+class GroupSearchForm(ModelForm):
+    class Meta:
+        model = Booking
+        fields = ['checkin', 'checkout']
+        widgets = {
+            'checkin': forms.DateInput(attrs={'type': 'date'}),
+            'checkout': forms.DateInput(attrs={'type': 'date'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['checkin'].widget.attrs['min'] = date.today().isoformat()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        checkin = cleaned_data.get("checkin")
+        checkout = cleaned_data.get("checkout")
+        if checkin and checkout and checkout <= checkin:
+            raise forms.ValidationError("El checkout debe ser posterior al checkin")
+        return cleaned_data
+
 
 class CustomerForm(ModelForm):
     class Meta:
@@ -42,6 +71,12 @@ class BookingForm(ModelForm):
             'guests': forms.HiddenInput()
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # the class level querysets are built at import, without a property, so they are scoped here
+        self.fields['room'].queryset = Room.objects.all()
+        self.fields['customer'].queryset = Customer.objects.all()
+
 
 class BookingFormExcluded(ModelForm):
     class Meta:
@@ -56,3 +91,40 @@ class BookingFormExcluded(ModelForm):
             'total': forms.HiddenInput(),
             'state': forms.HiddenInput(),
         }
+
+
+class WaitlistForm(ModelForm):
+    class Meta:
+        model = WaitlistEntry
+        fields = ['checkin', 'checkout', 'guests', 'room_type', 'name', 'email', 'phone']
+        labels = {
+            "room_type": "Tipo de habitación",
+            "name": "Nombre y apellido",
+            "phone": "Teléfono"
+        }
+        widgets = {
+            'checkin': forms.HiddenInput(),
+            'checkout': forms.HiddenInput(),
+            'guests': forms.HiddenInput(),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['room_type'].empty_label = "Cualquiera"
+        # room types of the current property only, see BookingForm
+        room_types = Room_type.objects.all()
+        guests = self.initial.get('guests') or self.data.get('guests')
+        if guests:
+            room_types = room_types.filter(max_guests__gte=guests)
+        self.fields['room_type'].queryset = room_types
+
+    def clean(self):
+        cleaned_data = super().clean()
+        checkin = cleaned_data.get("checkin")
+        checkout = cleaned_data.get("checkout")
+        if checkin and checkout:
+            if checkin < date.today() or checkout <= checkin:
+                raise forms.ValidationError("Fechas inválidas")
+            if (checkout - checkin).days > MAX_NIGHTS:
+                raise forms.ValidationError("La lista de espera admite hasta %d noches" % MAX_NIGHTS)
+        return cleaned_data
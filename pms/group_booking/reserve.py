@@ -0,0 +1,54 @@
+from django.db import transaction
+
+from ..availability import rooms as availability
+from ..customers import lookup
+from ..form_dates import Ymd
+from ..models import Booking, Room_type
+from ..reservation_code import generate
+from ..tenancy import context
+
+
+class Shortfall(Exception):
+    # raised when some room types do not have enough free rooms
+    def __init__(self, missing):
+        # missing: {room_type: (requested, available)}
+        self.missing = missing
+        super().__init__(", ".join("%s: %d/%d" % (room_type, available, requested)
+                                   for room_type, (requested, available) in missing.items()))
+
+
+def reserve(checkin, checkout, mix, customer_data):
+    # books all the rooms of the mix ({room_type_id: count}) or none of them,
+    # the customer is only stored together with the bookings
+    mix = {int(room_type): count for room_type, count in mix.items() if count > 0}
+    total_days = Ymd.Ymd(checkout) - Ymd.Ymd(checkin)
+    with transaction.atomic(using=context.database()):
+        rooms = (availability.free_rooms(checkin, checkout, room_type__in=list(mix))
+                 .select_related("room_type")
+                 .select_for_update()
+                 .order_by("room_type", "name"))
+        by_type = {}
+        for room in rooms:
+            by_type.setdefault(room.room_type_id, []).append(room)
+
+        short = {room_type: count for room_type, count in mix.items()
+                 if len(by_type.get(room_type, [])) < count}
+        if short:
+            types = Room_type.objects.in_bulk(list(short))
+            raise Shortfall({types.get(room_type, room_type): (count, len(by_type.get(room_type, [])))
+                             for room_type, count in short.items()})
+
+        customer = lookup.get_or_create(customer_data)
+        bookings = [
+            Booking(property_id=room.property_id,
+                    checkin=checkin,
+                    checkout=checkout,
+                    room=room,
+                    guests=room.room_type.max_guests,
+                    customer=customer,
+                    total=total_days * room.room_type.price,
+                    code=generate.get())
+            for room_type, count in mix.items()
+            for room in by_type[room_type][:count]
+        ]
+        return Booking.objects.bulk_create(bookings)
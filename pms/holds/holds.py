@@ -0,0 +1,95 @@
+from datetime import timedelta
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ..customers import lookup
+from ..models import Booking, InventoryHold, Room
+from ..tenancy import context
+
+# expired holds deleted on every new hold, they are found through the expires_at index
+PURGE_BATCH = 500
+
+
+class Unavailable(Exception):
+    # the room was booked or held by someone else
+    pass
+
+
+def duration():
+    return timedelta(minutes=getattr(settings, 'PMS_HOLD_MINUTES', 10))
+
+
+def active():
+    # holds that have not expired yet, expired ones are ignored even before they are purged
+    return InventoryHold.objects.filter(expires_at__gt=timezone.now())
+
+
+def blocking(checkin, checkout):
+    # active holds that touch the given dates
+    return active().filter(checkin__lte=checkout, checkout__gte=checkin)
+
+
+def purge_expired(limit=PURGE_BATCH):
+    # deletes the oldest expired holds, an index range scan instead of a table sweep
+    expired = list(InventoryHold.objects
+                   .filter(expires_at__lte=timezone.now())
+                   .order_by('expires_at')
+                   .values_list('id', flat=True)[:limit])
+    if expired:
+        InventoryHold.objects.filter(id__in=expired).delete()
+    return len(expired)
+
+
+def _taken(room, checkin, checkout, hold=None):
+    bookings = Booking.objects.filter(room=room, state=Booking.NEW, checkin__lte=checkout, checkout__gte=checkin)
+    others = blocking(checkin, checkout).filter(room=room)
+    if hold is not None:
+        others = others.exclude(id=hold.id)
+    return bookings.exists() or others.exists()
+
+
+def acquire(room, checkin, checkout, token=None):
+    # holds the room for the dates, or extends the hold of the same token; None when it is taken
+    with transaction.atomic(using=context.database()):
+        # serializes concurrent holds and bookings of the room where the database supports it
+        Room.objects.select_for_update().filter(id=room.id).first()
+        purge_expired()
+        hold = None
+        if token:
+            hold = InventoryHold.objects.filter(token=token, room=room, checkin=checkin, checkout=checkout).first()
+        if _taken(room, checkin, checkout, hold):
+            return None
+        if hold is None:
+            hold = InventoryHold(room=room, checkin=checkin, checkout=checkout, token=uuid4().hex)
+        hold.expires_at = timezone.now() + duration()
+        hold.save()
+        return hold
+
+
+def release(token):
+    # gives back the room-nights of a hold that is no longer needed
+    return InventoryHold.objects.filter(token=token).delete()[0]
+
+
+def convert(token, booking_form, customer_data):
+    # saves the booking of a valid booking form in place of its hold, raises Unavailable if it is taken.
+    # The customer (a returning one is reused) is only stored once the room is known to be free
+    data = booking_form.cleaned_data
+    room, checkin, checkout = data['room'], data['checkin'], data['checkout']
+    with transaction.atomic(using=context.database()):
+        Room.objects.select_for_update().filter(id=room.id).first()
+        hold = None
+        if token:
+            hold = InventoryHold.objects.filter(token=token, room=room, checkin=checkin, checkout=checkout).first()
+        if hold is not None:
+            # an expired hold still converts if nobody took the room meanwhile
+            hold.delete()
+        if _taken(room, checkin, checkout):
+            raise Unavailable()
+        booking = booking_form.save(commit=False)
+        booking.customer = lookup.get_or_create(customer_data)
+        booking.save()
+        return booking
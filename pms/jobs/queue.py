@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from ..models import Job
+from ..tenancy import context
+
+# seconds for the first retry, doubled on every failed attempt
+BACKOFF_BASE = 5
+BACKOFF_MAX = 3600
+# a RUNNING job older than this is considered abandoned by a dead worker
+STALE_AFTER = timedelta(minutes=15)
+# how many due jobs are looked at on every claim
+CLAIM_BATCH = 20
+
+_tasks = {}
+
+
+class Task:
+    def __init__(self, name, handler, concurrency, max_attempts):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+
+def task(name, concurrency=1, max_attempts=5):
+    # registers a handler for a job type, the handler receives the job payload
+    def register(handler):
+        _tasks[name] = Task(name, handler, concurrency, max_attempts)
+        return handler
+
+    return register
+
+
+def registry():
+    # the handlers are only imported when jobs are enqueued or run, not at boot
+    from . import tasks  # noqa: F401
+    return _tasks
+
+
+def get_task(name):
+    return registry()[name]
+
+
+def backoff(attempts):
+    # seconds to wait before the next attempt
+    return min(BACKOFF_BASE * 2 ** max(attempts - 1, 0), BACKOFF_MAX)
+
+
+def enqueue(name, payload=None, key=None, delay=0):
+    # stores a job, an existing job with the same idempotency key is returned instead
+    if key is not None:
+        existing = Job.objects.filter(idempotency_key=key).first()
+        if existing is not None:
+            return existing
+    job = Job(
+        name=name,
+        payload=payload or {},
+        idempotency_key=key,
+        max_attempts=get_task(name).max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    try:
+        with transaction.atomic(using=context.database()):
+            job.save()
+    except IntegrityError:
+        # another request enqueued the same key in the meantime
+        return Job.objects.get(idempotency_key=key)
+    return job
+
+
+def enqueue_on_commit(name, payload=None, key=None, delay=0):
+    # enqueues the job only once the current transaction has been committed
+    transaction.on_commit(lambda: enqueue(name, payload, key, delay), using=context.database())
+
+
+def release_stale():
+    # puts back jobs whose worker died while running them
+    limit = timezone.now() - STALE_AFTER
+    return (Job.objects
+            .filter(state=Job.RUNNING, locked_at__lt=limit)
+            .update(state=Job.PENDING, locked_at=None))
+
+
+def _running():
+    return dict(Job.objects
+                .filter(state=Job.RUNNING)
+                .values_list("name")
+                .annotate(total=Count("id"))
+                .order_by())
+
+
+def claim():
+    # marks the next due job as RUNNING and returns it, respecting per type concurrency
+    now = timezone.now()
+    running = _running()
+    candidates = (Job.objects
+                  .filter(state=Job.PENDING, run_at__lte=now, name__in=list(registry()))
+                  .order_by("run_at", "id")
+                  .values_list("id", "name")[:CLAIM_BATCH])
+    for job_id, name in candidates:
+        if running.get(name, 0) >= _tasks[name].concurrency:
+            continue
+        # conditional update so two workers never claim the same job
+        claimed = (Job.objects
+                   .filter(id=job_id, state=Job.PENDING)
+                   .update(state=Job.RUNNING, locked_at=now))
+        if not claimed:
+            continue
+        # another worker may have claimed the same type at the same time
+        if _running().get(name, 0) > _tasks[name].concurrency:
+            Job.objects.filter(id=job_id).update(state=Job.PENDING, locked_at=None)
+            running[name] = _tasks[name].concurrency
+            continue
+        return Job.objects.get(id=job_id)
+    return None
+
+
+def run(job):
+    # executes a claimed job and schedules a retry with backoff on failure
+    try:
+        get_task(job.name).handler(job.payload)
+    except Exception as error:
+        job.attempts += 1
+        job.last_error = repr(error)
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.state = Job.FAILED
+        else:
+            job.state = Job.PENDING
+            job.run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+        job.save(update_fields=["attempts", "last_error", "locked_at", "state", "run_at"])
+        return False
+    job.attempts += 1
+    job.state = Job.DONE
+    job.locked_at = None
+    job.save(update_fields=["attempts", "locked_at", "state"])
+    return True
+
+
+def work(limit=None):
+    # runs due jobs until there are none left, returns how many were processed
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim()
+        if job is None:
+            break
+        run(job)
+        processed += 1
+    return processed
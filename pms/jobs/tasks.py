@@ -0,0 +1,80 @@
+import logging
+from datetime import date
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.urls import reverse
+
+from ..models import Booking, Room, WaitlistEntry
+from .queue import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+
+def _notify(booking, subject, message):
+    from django.core.mail import send_mail
+
+    if booking.customer is None or not booking.customer.email:
+        return
+    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [booking.customer.email])
+
+
+@task("booking_created", concurrency=2)
+def booking_created(payload):
+    # sends the booking confirmation to the customer
+    booking = Booking.objects.select_related("customer", "room").get(id=payload["booking"])
+    _notify(booking,
+            "Reserva %s confirmada" % booking.code,
+            "Su reserva %s del %s al %s en la habitación %s está confirmada. Total: € %s"
+            % (booking.code, booking.checkin, booking.checkout, booking.room, booking.total))
+    logger.info("booking %s created", booking.code)
+
+
+@task("booking_updated", concurrency=2)
+def booking_updated(payload):
+    booking = Booking.objects.get(id=payload["booking"])
+    logger.info("booking %s updated", booking.code)
+
+
+@task("booking_cancelled", concurrency=2)
+def booking_cancelled(payload):
+    # lets the customer know the booking has been cancelled
+    booking = Booking.objects.select_related("customer").get(id=payload["booking"])
+    _notify(booking,
+            "Reserva %s cancelada" % booking.code,
+            "Su reserva %s del %s al %s ha sido cancelada." % (booking.code, booking.checkin, booking.checkout))
+    logger.info("booking %s cancelled", booking.code)
+
+
+@task("noop", concurrency=4, max_attempts=1)
+def noop(payload):
+    # used by the queue benchmark
+    return None
+
+
+@task("waitlist_release", concurrency=1)
+def waitlist_release(payload):
+    # offers the released room-nights to the waitlist
+    from ..waitlist import matcher
+
+    room = Room.objects.select_related("room_type").get(id=payload["room"])
+    for entry in matcher.match(room, date.fromisoformat(payload["checkin"]), date.fromisoformat(payload["checkout"])):
+        enqueue("waitlist_matched", {"entry": entry}, key="waitlist_matched:%s" % entry)
+
+
+@task("waitlist_matched", concurrency=2)
+def waitlist_matched(payload):
+    # lets the guest know the stay they were waiting for is available
+    from django.core.mail import send_mail
+
+    entry = WaitlistEntry.objects.select_related("room", "property").get(id=payload["entry"])
+    # mail clients need an absolute link, the property makes it open the right hotel
+    query = {"checkin": entry.checkin, "checkout": entry.checkout, "guests": entry.guests}
+    if entry.property is not None:
+        query["property"] = entry.property.slug
+    link = "%s%s?%s" % (settings.PMS_SITE_URL.rstrip("/"), reverse("booking", args=[entry.room_id]), urlencode(query))
+    send_mail("Hay disponibilidad para su estadía",
+              "Se liberó la habitación %s del %s al %s. Puede reservarla en %s"
+              % (entry.room, entry.checkin, entry.checkout, link),
+              settings.DEFAULT_FROM_EMAIL, [entry.email])
+    logger.info("waitlist entry %s matched room %s", entry.id, entry.room)
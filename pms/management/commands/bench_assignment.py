@@ -0,0 +1,76 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from pms.assignment import optimizer
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the room assignment optimizer on a synthetic calendar (no database access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--queries", type=int, default=2000, help="best fit lookups to time")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        days = options["days"]
+        # random first come first served assignment, which leaves the usual fragmentation
+        calendar = {room: [] for room in range(options["rooms"])}
+        movable = {}
+        booking = 0
+        for room, stays in calendar.items():
+            day = rng.randint(0, 3)
+            while True:
+                nights = rng.randint(1, 7)
+                if day + nights >= days:
+                    break
+                stays.append((day, day + nights))
+                day += nights + 1 + rng.choice((0, 0, 1, 2, 3))
+        for stays in calendar.values():
+            for stay in stays:
+                movable[booking] = stay
+                booking += 1
+        fixed = {room: [] for room in calendar}
+        self.stdout.write("%d rooms x %d days, %d bookings" % (len(calendar), days, len(movable)))
+
+        # best fit lookups against the per room neighbours of the stay
+        index = {room: sorted(stays) for room, stays in calendar.items()}
+        queries = [rng.randint(0, days - 8) for _ in range(options["queries"])]
+        start = time.perf_counter()
+        for checkin in queries:
+            checkout = checkin + rng.randint(1, 7)
+            candidates = []
+            for room, stays in index.items():
+                prev_checkout = next_checkin = None
+                free = True
+                for stay_checkin, stay_checkout in stays:
+                    if stay_checkout < checkin:
+                        prev_checkout = stay_checkout
+                    elif stay_checkin > checkout:
+                        next_checkin = stay_checkin
+                        break
+                    else:
+                        free = False
+                        break
+                if free:
+                    candidates.append((room, prev_checkout, next_checkin))
+            optimizer.best_fit(checkin, checkout, candidates)
+        elapsed = time.perf_counter() - start
+        self.stdout.write("best fit: %d lookups over %d rooms in %.2fs (%.2f ms/lookup, incl. candidate scan)"
+                          % (len(queries), len(calendar), elapsed, 1000 * elapsed / len(queries)))
+
+        before = optimizer.orphan_nights(calendar)
+        start = time.perf_counter()
+        assignment = optimizer.reassign(fixed, movable)
+        elapsed = time.perf_counter() - start
+        packed = {room: [] for room in calendar}
+        for booking, room in assignment.items():
+            packed[room].append(movable[booking])
+        after = optimizer.orphan_nights(packed)
+        empty = sum(1 for stays in packed.values() if not stays)
+        self.stdout.write("re-optimization: %d bookings in %.2fs, orphan nights %d -> %d (%d room-nights freed), "
+                          "%d rooms left completely free" % (len(movable), elapsed, before, after, before - after, empty))
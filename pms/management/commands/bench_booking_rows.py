@@ -0,0 +1,54 @@
+import resource
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pms.models import Booking, Customer, Room
+from pms.projections import bookings as projection
+from pms.tenancy import context
+
+
+class Command(BaseCommand):
+    help = "Compares memory and time of model instances and row projections for booking lists (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=100000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic(using=context.database()):
+            self.populate(options["bookings"])
+            queryset = Booking.objects.order_by("-created")
+            self.measure("model instances (list)", lambda: [
+                (booking.code, booking.customer.name, booking.room.name)
+                for booking in queryset.select_related("customer", "room")])
+            self.measure("row projection (list)", lambda: list(projection.iter_rows(queryset)))
+            self.measure("row projection (CSV stream)", lambda: sum(
+                len(line) for line in projection.iter_csv(projection.iter_rows(queryset))))
+            transaction.set_rollback(True)
+        # the RSS high-water mark of the process can only grow, it is reported for reference
+        self.stdout.write("process peak RSS: %.1f MB" % (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+    def populate(self, total):
+        customers = Customer.objects.bulk_create(
+            Customer(name="Guest %d" % i, email="guest%d@test.com" % i, phone=str(600000000 + i)) for i in range(1000))
+        rooms = list(Room.objects.all()[:50]) or [Room.objects.create(name="Bench", description="")]
+        start = date.today()
+        Booking.objects.bulk_create((
+            Booking(checkin=start + timedelta(days=i % 365), checkout=start + timedelta(days=i % 365 + 2),
+                    room=rooms[i % len(rooms)], guests=2, customer=customers[i % len(customers)],
+                    total=100.0, code="B%07d" % i)
+            for i in range(total)), batch_size=2000)
+        self.stdout.write("%d bookings created" % total)
+
+    def measure(self, name, run):
+        tracemalloc.start()
+        begin = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - begin
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        self.stdout.write("%-28s peak %7.1f MB  %6.2fs" % (name, peak / 2 ** 20, elapsed))
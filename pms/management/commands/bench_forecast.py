@@ -0,0 +1,38 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from pms.forecast import pace
+
+
+class Command(BaseCommand):
+    help = "Times the forecast computation (pace curves, on the books, forecast) over synthetic stays, without the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=1000000)
+        parser.add_argument("--room-types", type=int, default=8)
+
+    def handle(self, *args, **options):
+        total, types = options["bookings"], options["room_types"]
+        today = date.today()
+        rng = random.Random(1)
+        history = []
+        for _ in range(total):
+            checkin = today - timedelta(days=rng.randint(1, 3 * 365))
+            history.append((rng.randint(1, types), checkin, checkin + timedelta(days=rng.randint(1, 7)),
+                            checkin - timedelta(days=rng.randint(0, 400)), 100.0))
+        active = [(rng.randint(1, types), today + timedelta(days=day), today + timedelta(days=day + rng.randint(1, 7)))
+                  for day in (rng.randint(-3, pace.HORIZON) for _ in range(total // 20))]
+
+        begin = time.perf_counter()
+        paces = pace.curves(iter(history))
+        curves = time.perf_counter()
+        booked = pace.on_books(iter(active), today)
+        rows = list(pace.forecast([(room_type, 100.0, 50) for room_type in range(1, types + 1)], paces, booked, today))
+        end = time.perf_counter()
+        self.stdout.write("%d completed stays: pace curves in %.2fs (%.0f stays/s)"
+                          % (total, curves - begin, total / (curves - begin)))
+        self.stdout.write("%d active stays: on the books and %d forecast rows in %.2fs"
+                          % (len(active), len(rows), end - curves))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pms.jobs import queue
+from pms.tenancy import context
+
+
+class Command(BaseCommand):
+    help = "Measures job queue throughput, everything is rolled back at the end"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = options["jobs"]
+        with transaction.atomic(using=context.database()):
+            start = time.perf_counter()
+            for i in range(total):
+                queue.enqueue("noop", {"i": i}, key="bench:%d" % i)
+            enqueued = time.perf_counter() - start
+
+            # enqueueing the same keys again must not create new jobs
+            start = time.perf_counter()
+            for i in range(total):
+                queue.enqueue("noop", {"i": i}, key="bench:%d" % i)
+            duplicated = time.perf_counter() - start
+
+            start = time.perf_counter()
+            processed = queue.work()
+            worked = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write("enqueue:   %d jobs in %.2fs (%.0f jobs/s)" % (total, enqueued, total / enqueued))
+        self.stdout.write("duplicate: %d keys in %.2fs (%.0f jobs/s)" % (total, duplicated, total / duplicated))
+        self.stdout.write("work:      %d jobs in %.2fs (%.0f jobs/s)" % (processed, worked, processed / worked))
@@ -0,0 +1,63 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pms.models import Booking, Property, Room, WaitlistEntry
+from pms.tenancy import context
+from pms.waitlist import matcher
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the waitlist matcher with many entries and frequent cancellations (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=100000)
+        parser.add_argument("--cancellations", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        property = Property.objects.order_by("id").first()
+        with context.using(property), transaction.atomic(using=context.database()):
+            rooms = list(Room.objects.select_related("room_type"))
+            room_types = list({room.room_type for room in rooms if room.room_type})
+            today = date.today()
+
+            start = time.perf_counter()
+            entries = []
+            for i in range(options["entries"]):
+                checkin = today + timedelta(days=rng.randint(1, 365))
+                room_type = rng.choice(room_types + [None])
+                entries.append(WaitlistEntry(property=property, checkin=checkin,
+                                             checkout=checkin + timedelta(days=rng.randint(1, 7)),
+                                             guests=room_type.max_guests if room_type else rng.randint(1, 4),
+                                             room_type=room_type, name="Guest %d" % i,
+                                             email="guest%d@test.com" % i, phone="600000000"))
+            WaitlistEntry.objects.bulk_create(entries, batch_size=2000)
+            self.stdout.write("%d waitlist entries created in %.2fs" % (len(entries), time.perf_counter() - start))
+
+            bookings = []
+            for i in range(options["cancellations"]):
+                checkin = today + timedelta(days=rng.randint(1, 365))
+                bookings.append(Booking(property=property, checkin=checkin,
+                                        checkout=checkin + timedelta(days=rng.randint(1, 5)),
+                                        room=rng.choice(rooms), guests=1, total=1, code="W%07d" % i))
+            Booking.objects.bulk_create(bookings, batch_size=2000)
+
+            sample = bookings[0]
+            self.stdout.write("candidates query plan: %s" % matcher.candidates(
+                sample.room, sample.checkin, sample.checkout).explain())
+
+            matched = 0
+            start = time.perf_counter()
+            for booking in bookings:
+                Booking.objects.filter(id=booking.id).update(state=Booking.DELETED)
+                matched += len(matcher.match(booking.room, booking.checkin, booking.checkout))
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+
+        self.stdout.write("%d cancellations in %.2fs (%.2f ms each), %d entries matched"
+                          % (len(bookings), elapsed, 1000 * elapsed / len(bookings), matched))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from pms.assets import bundle
+
+
+class Command(BaseCommand):
+    help = "Bundles and minifies the app CSS and JS into pms/statics/dist and reports their sizes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="fail when a bundle is over PMS_ASSET_BUDGET")
+
+    def handle(self, *args, **options):
+        budget = getattr(settings, "PMS_ASSET_BUDGET", {})
+        over = []
+        self.stdout.write("%-10s %8s %8s %8s %8s" % ("bundle", "source", "min", "gzip", "brotli"))
+        for name, (source, raw, gzipped, compressed) in bundle.build().items():
+            self.stdout.write("%-10s %8d %8d %8d %8s" % (
+                name, source, raw, gzipped, compressed if compressed is not None else "-"))
+            if name in budget and gzipped > budget[name]:
+                over.append("%s (%d > %d gzip bytes)" % (name, gzipped, budget[name]))
+        if options["check"] and over:
+            raise CommandError("over the asset budget: %s" % ", ".join(over))
@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.db.models.functions import Lower, Trim
+
+from pms.models import Booking, Customer
+from pms.tenancy import commands, context
+
+
+class Command(BaseCommand):
+    help = ("Merges duplicated customers (same email and name, then same phone, email and name) and repoints "
+            "their bookings, groups that do not agree are only reported")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="duplicate groups merged per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="only report the duplicate groups")
+        commands.add_argument(parser)
+
+    def handle(self, *args, **options):
+        with context.using(commands.get_property(options)):
+            self.dedup(options)
+
+    def dedup(self, options):
+        start = time.perf_counter()
+        rows = 0
+        # a group is only merged when the other fields agree (same guest as in lookup.same_guest),
+        # shared emails or phones alone are not enough (families, companies, typos in a public form)
+        name = Lower(Trim("name"))
+        for field, agree in (("email_normalized", {"names": name}),
+                             ("phone_normalized", {"names": name, "emails": F("email_normalized")})):
+            variants = {key: Count(expression, distinct=True) for key, expression in agree.items()}
+            groups = list(Customer.objects
+                          .exclude(**{field: ""})
+                          .values(field, "property")
+                          .annotate(total=Count("id"), keep=Min("id"), **variants)
+                          .filter(total__gt=1)
+                          .order_by()
+                          .values_list(field, "property", "keep", *variants))
+            conflicts = [group for group in groups if max(group[3:]) > 1]
+            groups = [group[:3] for group in groups if max(group[3:]) == 1]
+            self.stdout.write("%d duplicate groups by %s" % (len(groups), field))
+            for key, property, _, *counts in conflicts:
+                self.stdout.write("skipped %s=%s (property %s): different %s" % (
+                    field, key, property, ", ".join(kind for kind, count in zip(variants, counts) if count > 1)))
+            if options["dry_run"]:
+                continue
+            size = options["chunk_size"]
+            for i in range(0, len(groups), size):
+                rows += self.merge(field, {(key, property): keep for key, property, keep in groups[i:i + size]})
+        elapsed = time.perf_counter() - start
+        self.stdout.write("%d rows updated in %.2fs (%.0f rows/s)" % (rows, elapsed, rows / elapsed if elapsed else 0))
+
+    def merge(self, field, keep_by_key):
+        # merges one chunk of duplicate groups, keeping the oldest customer of each group (per property)
+        with transaction.atomic(using=context.database()):
+            duplicates = {}
+            for customer_id, key, property in (Customer.objects
+                                               .filter(**{field + "__in": {key for key, _ in keep_by_key}})
+                                               .values_list("id", field, "property")):
+                keep = keep_by_key.get((key, property))
+                if keep is not None and customer_id != keep:
+                    duplicates.setdefault(keep, []).append(customer_id)
+            rows = 0
+            for keep, ids in duplicates.items():
+                rows += Booking.objects.filter(customer_id__in=ids).update(customer_id=keep)
+            deleted, _ = Customer.objects.filter(id__in=[i for ids in duplicates.values() for i in ids]).delete()
+            return rows + deleted
@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from pms.assignment import rooms
+from pms.models import Room_type
+from pms.tenancy import commands, context
+
+
+class Command(BaseCommand):
+    help = "Reassigns future bookings within each room type to reduce calendar fragmentation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--room-type", type=int, default=None, help="only this room type id")
+        parser.add_argument("--apply", action="store_true", help="save the new assignment, otherwise only report")
+        commands.add_argument(parser)
+
+    def handle(self, *args, **options):
+        with context.using(commands.get_property(options)):
+            self.optimize(options)
+
+    def optimize(self, options):
+        room_types = Room_type.objects.order_by("max_guests")
+        if options["room_type"] is not None:
+            room_types = room_types.filter(id=options["room_type"])
+        freed = 0
+        for room_type in room_types:
+            moved, before, after = rooms.reoptimize(room_type.id, date.today(), apply=options["apply"])
+            freed += before - after
+            self.stdout.write("%s: %d bookings moved, orphan nights %d -> %d" % (room_type, moved, before, after))
+        self.stdout.write("%d room-nights freed%s" % (freed, "" if options["apply"] else " (dry run, use --apply)"))
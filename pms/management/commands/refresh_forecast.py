@@ -0,0 +1,110 @@
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from pms.forecast import pace
+from pms.models import Booking, Forecast, ForecastPace, Room_type
+from pms.tenancy import commands, context
+
+
+class Command(BaseCommand):
+    help = ("Refreshes the occupancy and revenue forecast: the stays completed since the last run are "
+            "folded into the stored booking pace and only changed days are written")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--horizon", type=int, default=pace.HORIZON, help="days to forecast")
+        parser.add_argument("--rebuild", action="store_true",
+                            help="rebuild the pace from the whole history (after cancelling or editing past stays)")
+        commands.add_argument(parser)
+
+    def handle(self, *args, **options):
+        with context.using(commands.get_property(options)):
+            self.refresh(options)
+
+    def refresh(self, options):
+        today = date.today()
+        horizon = options["horizon"]
+        start = time.perf_counter()
+
+        paces, through = self.load(options["rebuild"])
+        # stays in rooms without a room type have no pace to fold into
+        history = (Booking.objects
+                   .filter(state=Booking.NEW, room__room_type__isnull=False, checkout__lte=today)
+                   .values_list("room__room_type", "checkin", "checkout", "created", "total"))
+        if through and None not in through.values():
+            # every room type has a stored pace, only the stays completed since the oldest one are read
+            history = history.filter(checkout__gt=min(through.values()))
+        completed = ((room_type, checkin, checkout, created.date(), total)
+                     for room_type, checkin, checkout, created, total in history.iterator(chunk_size=5000)
+                     if through.get(room_type) is None or checkout > through[room_type])
+        paces = pace.curves(completed, paces)
+        self.save(paces, today)
+
+        active = (Booking.objects
+                  .filter(state=Booking.NEW, room__room_type__isnull=False, checkout__gt=today)
+                  .values_list("room__room_type", "checkin", "checkout"))
+        booked = pace.on_books(active.iterator(chunk_size=5000), today, horizon)
+        room_types = (Room_type.objects
+                      .annotate(rooms=Count("room"))
+                      .values_list("id", "price", "rooms"))
+        rows = list(pace.forecast(room_types, paces, booked, today, horizon))
+        computed = time.perf_counter() - start
+
+        created, updated, deleted = self.store(rows, today, today + timedelta(days=horizon))
+        self.stdout.write("forecast computed in %.2fs: %d created, %d updated, %d deleted"
+                          % (computed, created, updated, deleted))
+
+    def load(self, rebuild):
+        # stored paces and the last checkout folded into them, per room type of the current property
+        through = {room_type: None for room_type in Room_type.objects.values_list("id", flat=True)}
+        # room types without completed stays get an empty pace too, so they are not read again next time
+        paces = {room_type: pace.Pace() for room_type in through}
+        if rebuild:
+            return paces, through
+        for stored in ForecastPace.objects.filter(room_type__in=list(through)):
+            paces[stored.room_type_id] = pace.Pace.load(stored.diff, stored.over, stored.nights, stored.revenue)
+            through[stored.room_type_id] = stored.through
+        return paces, through
+
+    def save(self, paces, today):
+        with transaction.atomic(using=context.database()):
+            stored = {item.room_type_id: item for item in ForecastPace.objects.filter(room_type__in=list(paces))}
+            new, changed = [], []
+            for room_type, curve in paces.items():
+                item = stored.get(room_type) or ForecastPace(room_type_id=room_type)
+                item.through = today
+                item.diff = curve.dump()
+                item.over, item.nights, item.revenue = curve.over, curve.nights, curve.revenue
+                (changed if item.pk else new).append(item)
+            ForecastPace.objects.bulk_create(new)
+            ForecastPace.objects.bulk_update(changed, ["through", "diff", "over", "nights", "revenue"])
+
+    def store(self, rows, today, end):
+        # forecasts of the room types of the current property only
+        forecasts = Forecast.objects.filter(room_type__in=Room_type.objects.all())
+        with transaction.atomic(using=context.database()):
+            deleted, _ = forecasts.exclude(date__gte=today, date__lt=end).delete()
+            existing = {(forecast.room_type_id, forecast.date): forecast for forecast in forecasts}
+            now = timezone.now()
+            new, changed = [], []
+            for room_type, day, on_books, expected, revenue in rows:
+                expected = round(expected, 2)
+                revenue = round(revenue, 2)
+                forecast = existing.get((room_type, day))
+                if forecast is None:
+                    new.append(Forecast(room_type_id=room_type, date=day, on_books=on_books,
+                                        expected_rooms=expected, expected_revenue=revenue))
+                elif (forecast.on_books, forecast.expected_rooms, forecast.expected_revenue) != (on_books, expected, revenue):
+                    forecast.on_books = on_books
+                    forecast.expected_rooms = expected
+                    forecast.expected_revenue = revenue
+                    forecast.updated = now
+                    changed.append(forecast)
+            Forecast.objects.bulk_create(new, batch_size=1000)
+            Forecast.objects.bulk_update(changed, ["on_books", "expected_rooms", "expected_revenue", "updated"],
+                                         batch_size=1000)
+        return len(new), len(changed), deleted
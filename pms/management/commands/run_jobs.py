@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pms.jobs import queue
+from pms.tenancy import commands, context
+
+
+class Command(BaseCommand):
+    help = "Runs the background job queue worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="process the due jobs and exit")
+        parser.add_argument("--sleep", type=float, default=1.0, help="seconds to wait when the queue is empty")
+        parser.add_argument("--limit", type=int, default=None, help="maximum jobs processed per pass")
+        commands.add_argument(parser)
+
+    def handle(self, *args, **options):
+        # properties with their own database need a worker each
+        with context.using(commands.get_property(options)):
+            self.work(options)
+
+    def work(self, options):
+        while True:
+            released = queue.release_stale()
+            if released:
+                self.stdout.write("released %d stale jobs" % released)
+            processed = queue.work(limit=options["limit"])
+            if processed:
+                self.stdout.write("processed %d jobs" % processed)
+            if options["once"]:
+                break
+            if not processed:
+                time.sleep(options["sleep"])
@@ -0,0 +1,86 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# runs in a fresh interpreter so nothing is already imported or cached
+SCRIPT = r"""
+import io, json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+modules = len(sys.modules)
+from chapp.wsgi import application
+warmup = time.perf_counter()
+
+def request(path):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80', 'HTTP_HOST': 'localhost', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+        'wsgi.multiprocess': True, 'wsgi.run_once': False,
+    }
+    status = []
+    begin = time.perf_counter()
+    body = b''.join(application(environ, lambda s, h, e=None: status.append(s)))
+    return (time.perf_counter() - begin) * 1000, status[0]
+
+first, status = request(sys.argv[1])
+second, _ = request(sys.argv[1])
+from django.conf import settings
+print(json.dumps({
+    'setup': (setup - start) * 1000,
+    'warmup': (warmup - setup) * 1000,
+    'first_request': first,
+    'second_request': second,
+    'status': status,
+    'modules': modules,
+    'budget': getattr(settings, 'PMS_STARTUP_BUDGET', {}),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measures the boot time of a new worker: django setup, warm-up and first request"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--path", default="/", help="url of the first request")
+        parser.add_argument("--check", action="store_true", help="fail when a step is over PMS_STARTUP_BUDGET")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        runs = []
+        for _ in range(options["runs"]):
+            result = subprocess.run([sys.executable, "-c", SCRIPT, options["path"]], env=env,
+                                    cwd=settings.BASE_DIR, capture_output=True, text=True)
+            if result.returncode:
+                raise CommandError(result.stderr)
+            runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+        # the timings of an error page say nothing about the real boot (e.g. a 500 without collectstatic)
+        failed = sorted({run["status"] for run in runs if run["status"][:1] not in ("2", "3")})
+        if failed:
+            raise CommandError("first request to %s answered %s" % (options["path"], ", ".join(failed)))
+
+        budget = runs[0]["budget"]
+        self.stdout.write("%s, %d runs, first request %s -> %s, %d modules after setup"
+                          % (settings.SETTINGS_MODULE, len(runs), options["path"], runs[0]["status"],
+                             runs[0]["modules"]))
+        over = []
+        for step in ("setup", "warmup", "first_request", "second_request"):
+            median = statistics.median(run[step] for run in runs)
+            limit = budget.get(step)
+            line = "%-15s %8.1f ms" % (step, median)
+            if limit is not None:
+                line += "  (budget %d ms%s)" % (limit, ", OVER" if median > limit else "")
+                if median > limit:
+                    over.append(step)
+            self.stdout.write(line)
+        if options["check"] and over:
+            raise CommandError("over the startup budget: %s" % ", ".join(over))
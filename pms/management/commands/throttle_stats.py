@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from pms.throttling import throttle
+
+
+class Command(BaseCommand):
+    help = "Prints the counters of throttled and coalesced search requests (shared store only across workers)"
+
+    def handle(self, *args, **options):
+        counters = throttle.get_store().counters()
+        for name in sorted(counters):
+            self.stdout.write("%-30s %d" % (name, counters[name]))
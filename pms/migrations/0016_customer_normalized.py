@@ -0,0 +1,47 @@
+# Generated by Django 4.0.2 on 2026-10-19 07:44
+
+from django.db import migrations, models
+
+from pms.customers import normalize
+
+
+def fill_normalized(apps, schema_editor):
+    Customer = apps.get_model('pms', 'Customer')
+    batch = []
+    for customer in Customer.objects.only('id', 'email', 'phone').iterator(chunk_size=1000):
+        customer.email_normalized = normalize.email(customer.email)
+        customer.phone_normalized = normalize.phone(customer.phone)
+        batch.append(customer)
+        if len(batch) == 1000:
+            Customer.objects.bulk_update(batch, ['email_normalized', 'phone_normalized'])
+            batch = []
+    Customer.objects.bulk_update(batch, ['email_normalized', 'phone_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0015_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='email_normalized',
+            field=models.CharField(default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='phone_normalized',
+            field=models.CharField(default='', editable=False, max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['email_normalized'], name='pms_custome_email_n_a459c0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['phone_normalized'], name='pms_custome_phone_n_971a80_idx'),
+        ),
+        migrations.RunPython(fill_normalized, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.0.2 on 2026-10-19 07:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0016_customer_normalized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Forecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('on_books', models.IntegerField()),
+                ('expected_rooms', models.FloatField()),
+                ('expected_revenue', models.FloatField()),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('room_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pms.room_type')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='forecast',
+            constraint=models.UniqueConstraint(fields=('room_type', 'date'), name='unique_forecast_day'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.0.2 on 2026-10-19 07:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def default_property(apps, schema_editor):
+    # the existing hotel becomes the first property
+    if schema_editor.connection.alias != 'default':
+        return
+    Property = apps.get_model('pms', 'Property')
+    property = Property.objects.create(name='CHAPP-Inn', slug='chapp-inn')
+    for name in ('Customer', 'Room_type', 'Room', 'Booking'):
+        apps.get_model('pms', name).objects.update(property=property)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0017_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Property',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('database', models.CharField(blank=True, max_length=100)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='property',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='pms.property'),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='property',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='pms.property'),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='property',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='pms.property'),
+        ),
+        migrations.AddField(
+            model_name='room_type',
+            name='property',
+            field=models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='pms.property'),
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='pms_custome_email_n_a459c0_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='pms_custome_phone_n_971a80_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['property', 'checkin', 'checkout'], name='pms_booking_propert_2f4322_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['property', 'created'], name='pms_booking_propert_e32bba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['property', 'email_normalized'], name='pms_custome_propert_6b1f5c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['property', 'phone_normalized'], name='pms_custome_propert_2107c5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['property', 'room_type', 'name'], name='pms_room_propert_93d67a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room_type',
+            index=models.Index(fields=['property', 'max_guests'], name='pms_room_ty_propert_07d78e_idx'),
+        ),
+        migrations.RunPython(default_property, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.0.2 on 2026-10-19 07:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0018_property'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('WAI', 'En espera'), ('MAT', 'Disponible'), ('DEL', 'Cancelada')], default='WAI', max_length=3)),
+                ('checkin', models.DateField()),
+                ('checkout', models.DateField()),
+                ('guests', models.IntegerField()),
+                ('name', models.CharField(max_length=200)),
+                ('email', models.EmailField(max_length=254)),
+                ('phone', models.CharField(max_length=50)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('property', models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='pms.property')),
+                ('room', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='pms.room')),
+                ('room_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pms.room_type')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='waitlistentry',
+            index=models.Index(fields=['property', 'state', 'room_type', 'checkin'], name='pms_waitlis_propert_1dc32d_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.0.2 on 2026-10-19 08:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0019_waitlist'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checkin', models.DateField()),
+                ('checkout', models.DateField()),
+                ('token', models.CharField(max_length=32, unique=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('property', models.ForeignKey(db_constraint=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='pms.property')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pms.room')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='inventoryhold',
+            index=models.Index(fields=['property', 'expires_at'], name='pms_invento_propert_76d2fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryhold',
+            index=models.Index(fields=['room', 'checkin'], name='pms_invento_room_id_f02b81_idx'),
+        ),
+    ]
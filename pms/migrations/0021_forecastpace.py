@@ -0,0 +1,26 @@
+# Generated by Django 4.0.2 on 2026-10-19 08:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pms', '0020_inventoryhold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastPace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('through', models.DateField()),
+                ('diff', models.BinaryField()),
+                ('over', models.BigIntegerField(default=0)),
+                ('nights', models.BigIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('room_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='pms.room_type')),
+            ],
+        ),
+    ]
@@ -1,36 +1,100 @@
 from django.db import models
 
+from .customers import normalize
+from .tenancy import context
+
 
 # Create your models here.
 
-class Customer(models.Model):
+class Property(models.Model):
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True)
+    # alias in DATABASES when the hotel has its own database, empty to use the default one
+    database = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+class PropertyManager(models.Manager):
+    # only returns the rows of the current property, if any
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        property = context.current()
+        if property is not None:
+            queryset = queryset.filter(property=property.id)
+        return queryset
+
+
+class PropertyModel(models.Model):
+    # the property may live in another database, so there is no database constraint
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, null=True, editable=False, db_constraint=False)
+
+    objects = PropertyManager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if self.property_id is None and context.current() is not None:
+            self.property_id = context.current().id
+        super().save(*args, **kwargs)
+
+
+class Customer(PropertyModel):
     name = models.CharField(max_length=200)
     email = models.EmailField()
     phone = models.CharField(max_length=50)  # TODO:ADD REGEX FOR PHONE VALIDATION
+    # lookup keys used to reuse returning customers
+    email_normalized = models.CharField(max_length=254, editable=False, default="")
+    phone_normalized = models.CharField(max_length=50, editable=False, default="")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'email_normalized']),
+            models.Index(fields=['property', 'phone_normalized']),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.email_normalized = normalize.email(self.email)
+        self.phone_normalized = normalize.phone(self.phone)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'email_normalized', 'phone_normalized'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
-class Room_type(models.Model):
+class Room_type(PropertyModel):
     name = models.CharField(max_length=100)
     price = models.FloatField()
     max_guests = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'max_guests']),
+        ]
+
     def __str__(self):
         return self.name
 
 
-class Room(models.Model):
+class Room(PropertyModel):
     room_type = models.ForeignKey(Room_type, on_delete=models.SET_NULL, null=True)
     name = models.CharField(max_length=100)
     description = models.CharField(max_length=500)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'room_type', 'name']),
+        ]
+
     def __str__(self):
         return self.name
 
 
-class Booking(models.Model):
+class Booking(PropertyModel):
     NEW = 'NEW'
     DELETED = 'DEL'
     STATE_CHOICES = [
@@ -51,5 +115,132 @@ class Booking(models.Model):
     code = models.CharField(max_length=8)
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'checkin', 'checkout']),
+            models.Index(fields=['property', 'created']),
+        ]
+
     def __str__(self):
         return self.code
+
+
+class Job(models.Model):
+    PENDING = 'PEN'
+    RUNNING = 'RUN'
+    DONE = 'DON'
+    FAILED = 'ERR'
+    STATE_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En curso'),
+        (DONE, 'Terminado'),
+        (FAILED, 'Fallido'),
+    ]
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    idempotency_key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    state = models.CharField(
+        max_length=3,
+        choices=STATE_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_at = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'run_at']),
+            models.Index(fields=['name', 'state']),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Forecast(models.Model):
+    room_type = models.ForeignKey(Room_type, on_delete=models.CASCADE)
+    date = models.DateField()
+    on_books = models.IntegerField()
+    expected_rooms = models.FloatField()
+    expected_revenue = models.FloatField()
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room_type', 'date'], name='unique_forecast_day'),
+        ]
+
+    def __str__(self):
+        return "%s %s" % (self.room_type, self.date)
+
+
+class ForecastPace(models.Model):
+    # booking pace of a room type folded from the completed stays that checked out up to `through`,
+    # so the nightly refresh only reads the stays completed since the last run
+    room_type = models.OneToOneField(Room_type, on_delete=models.CASCADE)
+    through = models.DateField()
+    diff = models.BinaryField()
+    over = models.BigIntegerField(default=0)
+    nights = models.BigIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    def __str__(self):
+        return "%s %s" % (self.room_type, self.through)
+
+
+class WaitlistEntry(PropertyModel):
+    WAITING = 'WAI'
+    MATCHED = 'MAT'
+    CANCELLED = 'DEL'
+    STATE_CHOICES = [
+        (WAITING, 'En espera'),
+        (MATCHED, 'Disponible'),
+        (CANCELLED, 'Cancelada'),
+    ]
+    state = models.CharField(
+        max_length=3,
+        choices=STATE_CHOICES,
+        default=WAITING,
+    )
+    checkin = models.DateField()
+    checkout = models.DateField()
+    guests = models.IntegerField()
+    # empty when any room type for the guests is fine
+    room_type = models.ForeignKey(Room_type, on_delete=models.CASCADE, null=True, blank=True)
+    name = models.CharField(max_length=200)
+    email = models.EmailField()
+    phone = models.CharField(max_length=50)
+    # room that became free for the stay
+    room = models.ForeignKey(Room, on_delete=models.SET_NULL, null=True, blank=True, editable=False)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'state', 'room_type', 'checkin']),
+        ]
+
+    def __str__(self):
+        return "%s %s-%s" % (self.name, self.checkin, self.checkout)
+
+
+class InventoryHold(PropertyModel):
+    # room-nights reserved while the guest fills the booking form
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    checkin = models.DateField()
+    checkout = models.DateField()
+    token = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['property', 'expires_at']),
+            models.Index(fields=['room', 'checkin']),
+        ]
+
+    def __str__(self):
+        return self.token
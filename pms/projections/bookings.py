@@ -0,0 +1,56 @@
+import csv
+import json
+from collections import namedtuple
+
+# read-only booking rows for lists and exports: one tuple per booking instead
+# of a Booking instance plus its Room and Customer instances
+FIELDS = (
+    "id", "code", "state", "checkin", "checkout", "guests", "total", "created",
+    "room_id", "room__name", "customer__name", "customer__email", "customer__phone",
+)
+BookingRow = namedtuple("BookingRow", (
+    "id", "code", "state", "checkin", "checkout", "guests", "total", "created",
+    "room_id", "room_name", "customer_name", "customer_email", "customer_phone",
+))
+
+EXPORT_HEADER = ["code", "state", "checkin", "checkout", "guests", "total", "created",
+                 "room", "customer", "email", "phone"]
+
+
+def iter_rows(queryset, chunk_size=2000):
+    # streams the bookings of the queryset as BookingRow, fetching chunk_size rows at a time
+    make = BookingRow._make
+    for values in queryset.values_list(*FIELDS).iterator(chunk_size=chunk_size):
+        yield make(values)
+
+
+def export_values(row):
+    # values of a row in EXPORT_HEADER order, dates as ISO strings
+    return [row.code, row.state, row.checkin.isoformat(), row.checkout.isoformat(), row.guests, row.total,
+            row.created.isoformat(timespec="seconds"), row.room_name, row.customer_name, row.customer_email,
+            row.customer_phone]
+
+
+def iter_csv(rows):
+    # CSV lines produced one booking at a time
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(export_values(row))
+
+
+def iter_json(rows):
+    # a JSON array produced one booking at a time
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + encode(dict(zip(EXPORT_HEADER, export_values(row))))
+        separator = ","
+    yield "]"
+
+
+class Echo:
+    # file-like object for csv.writer that returns the line instead of storing it
+    def write(self, value):
+        return value
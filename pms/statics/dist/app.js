@@ -0,0 +1,16 @@
+Date.prototype.addDays = function(days) {
+var date = new Date(this.valueOf());
+date.setDate(date.getDate() + days);
+return date;
+}
+function onDateUpdate(){
+const date1=new Date(document.querySelector("#id_checkin").value)
+const date2=new Date(document.querySelector("#id_checkout").value)
+document.querySelector("#total-days").innerHTML=(date2.getTime() - date1.getTime())/(1000*3600*24)
+}
+if(document.querySelector("#id_guests")){
+document.querySelector("#id_checkout").addEventListener("change",(e)=>{
+onDateUpdate()
+document.querySelector("#id_guests").focus()
+})
+}
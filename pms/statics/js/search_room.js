@@ -11,11 +11,14 @@ function onDateUpdate(){
 
 }
 
-document.querySelector("#id_checkout").addEventListener("change",(e)=>{
-    onDateUpdate()
-    document.querySelector("#id_guests").focus()
-    
-})
+// the bundle is loaded on every page, only the room search form has the guests field
+if(document.querySelector("#id_guests")){
+    document.querySelector("#id_checkout").addEventListener("change",(e)=>{
+        onDateUpdate()
+        document.querySelector("#id_guests").focus()
+
+    })
+}
 // document.querySelector("#id_checkin").addEventListener("change",(e)=>{
 //     const checkout=document.querySelector("#id_checkout")
 
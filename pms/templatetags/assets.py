@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from ..assets import bundle
+
+register = template.Library()
+
+
+@register.simple_tag
+def inline_css(name="app.css"):
+    # the app stylesheet is small enough to be inlined whole, it saves a render blocking request
+    return mark_safe("<style>%s</style>" % bundle.inline(name))
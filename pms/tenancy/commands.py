@@ -0,0 +1,17 @@
+from django.core.management.base import CommandError
+
+from ..models import Property
+
+
+def add_argument(parser):
+    parser.add_argument("--property", default=None, help="slug of the property to work on, all of them by default")
+
+
+def get_property(options):
+    slug = options.get("property")
+    if not slug:
+        return None
+    property = Property.objects.filter(slug=slug).first()
+    if property is None:
+        raise CommandError("Property %s does not exist" % slug)
+    return property
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import DEFAULT_DB_ALIAS
+
+# the hotel the current request or command works on
+_current = ContextVar("pms_property", default=None)
+
+
+def current():
+    return _current.get()
+
+
+def database():
+    # alias of the database that holds the current property data
+    property = _current.get()
+    if property is not None and property.database:
+        return property.database
+    return DEFAULT_DB_ALIAS
+
+
+def activate(property):
+    return _current.set(property)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def using(property):
+    # scopes the queries inside the block to the given property
+    token = activate(property)
+    try:
+        yield property
+    finally:
+        deactivate(token)
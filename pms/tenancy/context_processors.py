@@ -0,0 +1,9 @@
+from ..models import Property
+
+
+def properties(request):
+    # template context: the hotels to switch between and the current one
+    return {
+        "properties": Property.objects.order_by("name"),
+        "current_property": getattr(request, "property", None),
+    }
@@ -0,0 +1,47 @@
+from django.conf import settings
+
+from ..models import Property
+from . import context
+
+# properties rarely change, they are looked up once per process
+_properties = {}
+
+
+def get_property(slug):
+    # only existing properties are cached, any ?property= value would grow the dict otherwise
+    property = _properties.get(slug)
+    if property is None:
+        property = Property.objects.filter(slug=slug).first()
+        if property is not None:
+            _properties[slug] = property
+    return property
+
+
+def default_property():
+    slug = getattr(settings, "PMS_DEFAULT_PROPERTY", None)
+    if slug:
+        return get_property(slug)
+    if _properties.get(None) is None:
+        _properties[None] = Property.objects.order_by("id").first()
+    return _properties[None]
+
+
+class PropertyMiddleware:
+    # picks the hotel of the request (?property=<slug>, then the session, then the default)
+    # and scopes every pms query of the request to it
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        slug = request.GET.get("property")
+        property = get_property(slug) if slug else None
+        if property is not None:
+            request.session["property"] = property.slug
+        elif request.session.get("property"):
+            property = get_property(request.session["property"])
+        if property is None:
+            property = default_property()
+        request.property = property
+        with context.using(property):
+            return self.get_response(request)
+
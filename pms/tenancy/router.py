@@ -0,0 +1,33 @@
+from django.conf import settings
+
+from . import context
+
+
+class PropertyRouter:
+    # sends the hotel data of properties with their own database to that database,
+    # the properties directory itself always stays in the default one
+
+    def _db(self, model):
+        if model._meta.app_label != "pms" or model._meta.model_name == "property":
+            return None
+        property = context.current()
+        if property is not None and property.database:
+            return property.database
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db(model)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if obj1._meta.app_label == "pms" and obj2._meta.app_label == "pms":
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # property databases only hold the pms tables
+        if db in getattr(settings, "PMS_PROPERTY_DATABASES", {}):
+            return app_label == "pms"
+        return None
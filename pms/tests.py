@@ -1,3 +1,394 @@
-from django.test import TestCase
+import random
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .assignment import optimizer
+from .assignment import rooms as assignment
+from .availability import rooms as availability
+from .forms import BookingForm, WaitlistForm
+from .holds import holds
+from .jobs import queue
+from .throttling import throttle
+from .waitlist import matcher
+from .models import (Booking, Customer, ForecastPace, InventoryHold, Job, Property, Room, Room_type,
+                     WaitlistEntry)
+from .tenancy import context, middleware
+
+
+def overlaps(stays):
+    stays = sorted(stays)
+    return any(nxt[0] <= prev[1] for prev, nxt in zip(stays, stays[1:]))
+
+
+class OptimizerTest(SimpleTestCase):
+    def test_orphan_nights_counts_short_gaps_only(self):
+        rooms = {
+            "A": [(1, 3), (5, 6)],  # 1 free day: orphan
+            "B": [(1, 3), (4, 6)],  # adjacent: no gap
+            "C": [(1, 3), (7, 9)],  # 3 free days: sellable
+        }
+        self.assertEqual(optimizer.gaps(rooms["A"]), [1])
+        self.assertEqual(optimizer.gaps(rooms["B"]), [0])
+        self.assertEqual(optimizer.orphan_nights(rooms), 1)
+
+    def test_best_fit_prefers_adjacent_room(self):
+        # stay 10-12: A leaves a 1 day orphan before, B is adjacent, C is empty
+        candidates = [("A", 8, None), ("B", 9, None), ("C", None, None)]
+        self.assertEqual(optimizer.best_fit(10, 12, candidates), "B")
+
+    def test_best_fit_avoids_orphans_before_tight_windows(self):
+        # A is the tightest window but leaves an orphan day after the stay
+        candidates = [("A", 9, 14), ("B", 5, None)]
+        self.assertEqual(optimizer.best_fit(10, 12, candidates), "B")
+        self.assertIsNone(optimizer.best_fit(10, 12, []))
+
+    def test_reassign_keeps_fixed_stays(self):
+        # the guest in A stays until day 5, a stay from day 2 cannot go there
+        fixed = {"A": [(0, 5)], "B": []}
+        result = optimizer.reassign(fixed, {1: (2, 4), 2: (6, 8)})
+        self.assertEqual(result[1], "B")
+        # the stay right after the fixed one is packed next to it
+        self.assertEqual(result[2], "A")
+
+    def test_reassign_packs_adjacent_stays(self):
+        fixed = {"A": [], "B": []}
+        movable = {1: (1, 3), 2: (4, 6), 3: (7, 9)}
+        result = optimizer.reassign(fixed, movable)
+        self.assertEqual(len(set(result.values())), 1)
+
+    def test_reassign_without_rooms(self):
+        fixed = {"A": [(0, 5)]}
+        self.assertIsNone(optimizer.reassign(fixed, {1: (3, 4)}))
+
+    def test_reassign_never_overlaps(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            fixed = {room: [] for room in range(4)}
+            for room in fixed:
+                if rng.random() < 0.5:
+                    fixed[room].append((rng.randint(-5, 0), rng.randint(1, 6)))
+            movable = {}
+            for booking in range(rng.randint(1, 12)):
+                checkin = rng.randint(1, 40)
+                movable[booking] = (checkin, checkin + rng.randint(1, 5))
+            result = optimizer.reassign(fixed, movable)
+            if result is None:
+                continue
+            packed = {room: list(stays) for room, stays in fixed.items()}
+            for booking, room in result.items():
+                packed[room].append(movable[booking])
+            self.assertFalse(any(overlaps(stays) for stays in packed.values()))
+
+
+class ReoptimizeTest(TestCase):
+    def setUp(self):
+        self.today = date(2030, 1, 1)
+        self.room_type = Room_type.objects.create(name="Doble", price=50, max_guests=2)
+        self.rooms = [Room.objects.create(name="R%d" % i, description="", room_type=self.room_type) for i in range(3)]
+
+    def book(self, room, checkin, nights):
+        checkin = self.today + timedelta(days=checkin)
+        return Booking.objects.create(room=room, checkin=checkin, checkout=checkin + timedelta(days=nights),
+                                      guests=1, total=1, code="T")
+
+    def stays(self):
+        # the same stays reoptimize looks at: not checked out before today
+        stays = {room.id: [] for room in self.rooms}
+        for room, checkin, checkout in (Booking.objects.filter(state=Booking.NEW, checkout__gte=self.today)
+                                        .values_list("room", "checkin", "checkout")):
+            stays[room].append((checkin.toordinal(), checkout.toordinal()))
+        return stays
+
+    def test_never_worse_than_before(self):
+        rng = random.Random(3)
+        for _ in range(10):
+            Booking.objects.all().delete()
+            for room in self.rooms:
+                day = rng.randint(-2, 3)
+                while day < 40:
+                    nights = rng.randint(1, 4)
+                    self.book(room, day, nights)
+                    day += nights + 1 + rng.randint(0, 3)
+            before = optimizer.orphan_nights(self.stays())
+            moved, reported_before, after = assignment.reoptimize(self.room_type.id, self.today, apply=True)
+            self.assertEqual(reported_before, before)
+            self.assertLessEqual(after, before)
+            self.assertEqual(optimizer.orphan_nights(self.stays()), after)
+            self.assertFalse(any(overlaps(stays) for stays in self.stays().values()))
+
+    def test_optimal_calendar_is_left_alone(self):
+        self.book(self.rooms[0], 1, 2)
+        self.book(self.rooms[0], 4, 2)
+        self.assertEqual(assignment.reoptimize(self.room_type.id, self.today, apply=True), (0, 0, 0))
+
+
+# the manifest only exists after collectstatic
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class TenancyTest(TestCase):
+    def setUp(self):
+        # ids are reused between tests, the per process cache would return stale properties
+        middleware._properties.clear()
+        self.a = Property.objects.create(name="Hotel A", slug="hotel-a")
+        self.b = Property.objects.create(name="Hotel B", slug="hotel-b")
+        with context.using(self.a):
+            self.room_type_a = Room_type.objects.create(name="Doble", price=50, max_guests=2)
+            self.room_a = Room.objects.create(name="A1", description="", room_type=self.room_type_a)
+        with context.using(self.b):
+            self.room_type_b = Room_type.objects.create(name="Doble", price=60, max_guests=2)
+            self.room_b = Room.objects.create(name="B1", description="", room_type=self.room_type_b)
+            self.customer_b = Customer.objects.create(name="Bea", email="bea@b.com", phone="1")
+
+    def booking_data(self, room):
+        return {"state": Booking.NEW, "checkin": "2031-05-01", "checkout": "2031-05-03", "guests": 1,
+                "room": room.id, "customer": self.customer_b.id, "total": 100, "code": "T1"}
+
+    def test_queries_and_saves_are_scoped(self):
+        self.assertEqual(self.room_a.property_id, self.a.id)
+        with context.using(self.b):
+            self.assertEqual(list(Room.objects.all()), [self.room_b])
+        with context.using(self.a):
+            self.assertEqual(list(Room.objects.all()), [self.room_a])
+
+    def test_booking_form_rejects_room_of_other_property(self):
+        with context.using(self.b):
+            self.assertTrue(BookingForm(self.booking_data(self.room_b)).is_valid())
+            form = BookingForm(self.booking_data(self.room_a))
+            self.assertFalse(form.is_valid())
+            self.assertIn("room", form.errors)
+
+    def test_booking_post_rejects_room_of_other_property(self):
+        response = self.client.post("/booking/%s/?property=hotel-b" % self.room_a.id, {
+            "customer-name": "Bea", "customer-email": "bea@b.com", "customer-phone": "1",
+            "booking-checkin": "2031-05-01", "booking-checkout": "2031-05-03", "booking-guests": "1",
+            "booking-total": "100", "booking-state": Booking.NEW,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_waitlist_form_lists_current_room_types(self):
+        with context.using(self.b):
+            self.assertEqual(list(WaitlistForm().fields["room_type"].queryset), [self.room_type_b])
+            self.assertEqual(list(WaitlistForm(initial={"guests": 2}).fields["room_type"].queryset),
+                             [self.room_type_b])
+
+    def test_middleware_picks_and_remembers_property(self):
+        response = self.client.get("/?property=hotel-b")
+        self.assertEqual(response.wsgi_request.property, self.b)
+        self.assertEqual(self.client.get("/").wsgi_request.property, self.b)
+
+    def test_unknown_slugs_are_not_cached(self):
+        self.assertIsNone(middleware.get_property("nope"))
+        self.assertNotIn("nope", middleware._properties)
+
+
+class DedupCustomersTest(TestCase):
+    def dedup(self):
+        call_command("dedup_customers", stdout=StringIO())
+        return sorted(Customer.objects.values_list("name", flat=True))
+
+    def test_family_sharing_email_and_phone_is_kept(self):
+        Customer.objects.create(name="Ana", email="fam@x.com", phone="600 1")
+        Customer.objects.create(name="Juan", email="fam@x.com", phone="6001")
+        self.assertEqual(self.dedup(), ["Ana", "Juan"])
+
+    def test_phone_only_customers_need_the_same_name(self):
+        Customer.objects.create(name="Ana", email="", phone="600 1")
+        Customer.objects.create(name="Juan", email="", phone="6001")
+        self.assertEqual(self.dedup(), ["Ana", "Juan"])
+
+    def test_same_guest_is_merged(self):
+        kept = Customer.objects.create(name="Ana", email="ana@x.com", phone="600 1")
+        duplicate = Customer.objects.create(name="ana ", email="ANA@x.com", phone="6001")
+        booking = Booking.objects.create(checkin=date(2031, 1, 1), checkout=date(2031, 1, 2), guests=1,
+                                         customer=duplicate, total=1, code="T")
+        self.assertEqual(self.dedup(), ["Ana"])
+        booking.refresh_from_db()
+        self.assertEqual(booking.customer_id, kept.id)
+
+
+class RefreshForecastTest(TestCase):
+    def test_rooms_without_room_type_are_ignored(self):
+        room_type = Room_type.objects.create(name="Doble", price=50, max_guests=2)
+        typed = Room.objects.create(name="R1", description="", room_type=room_type)
+        untyped = Room.objects.create(name="R2", description="", room_type=None)
+        checkin = date.today() - timedelta(days=10)
+        for room in (typed, untyped):
+            Booking.objects.create(room=room, checkin=checkin, checkout=checkin + timedelta(days=2),
+                                   guests=1, total=100, code="T")
+        call_command("refresh_forecast", stdout=StringIO())
+        self.assertEqual(list(ForecastPace.objects.values_list("room_type", "nights")), [(room_type.id, 2)])
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class HoldsTest(TestCase):
+    def setUp(self):
+        # the requests run under the default property, the rows must belong to it
+        middleware._properties.clear()
+        self.addCleanup(context.deactivate, context.activate(middleware.default_property()))
+        self.room_type = Room_type.objects.create(name="Doble", price=50, max_guests=2)
+        self.room = Room.objects.create(name="R1", description="", room_type=self.room_type)
+        self.checkin, self.checkout = date(2031, 5, 1), date(2031, 5, 3)
+
+    def expire(self, hold):
+        InventoryHold.objects.filter(id=hold.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def post(self, hold=""):
+        return self.client.post("/booking/%s/" % self.room.id, {
+            "customer-name": "Ana", "customer-email": "ana@x.com", "customer-phone": "1",
+            "booking-checkin": self.checkin, "booking-checkout": self.checkout, "booking-guests": "1",
+            "booking-total": "100", "booking-state": Booking.NEW, "hold": hold,
+        })
+
+    def test_hold_blocks_other_visitors(self):
+        hold = holds.acquire(self.room, self.checkin, self.checkout)
+        self.assertIsNone(holds.acquire(self.room, self.checkout, date(2031, 5, 5)))
+        self.assertFalse(availability.free_rooms(self.checkin, self.checkout).filter(id=self.room.id).exists())
+        # the same visitor extends their own hold
+        self.assertEqual(holds.acquire(self.room, self.checkin, self.checkout, hold.token).id, hold.id)
+
+    def test_expired_hold_is_ignored_and_purged(self):
+        hold = holds.acquire(self.room, self.checkin, self.checkout)
+        self.expire(hold)
+        self.assertTrue(availability.free_rooms(self.checkin, self.checkout).filter(id=self.room.id).exists())
+        self.assertEqual(holds.purge_expired(), 1)
+        self.assertFalse(InventoryHold.objects.exists())
+
+    def test_hold_becomes_the_booking(self):
+        hold = holds.acquire(self.room, self.checkin, self.checkout)
+        self.assertEqual(self.post(hold.token).status_code, 302)
+        booking = Booking.objects.get()
+        self.assertEqual((booking.room, booking.customer.name), (self.room, "Ana"))
+        self.assertFalse(InventoryHold.objects.exists())
+
+    def test_held_room_is_not_booked_and_no_customer_is_stored(self):
+        holds.acquire(self.room, self.checkin, self.checkout)
+        self.assertEqual(self.post().status_code, 409)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(Customer.objects.exists())
+
+    def test_one_hold_per_session(self):
+        other = Room.objects.create(name="R2", description="", room_type=self.room_type)
+        query = "?checkin=2031-05-01&checkout=2031-05-03&guests=1"
+        self.client.get("/booking/%s/%s" % (self.room.id, query))
+        self.client.get("/booking/%s/%s" % (other.id, query))
+        self.assertEqual(list(InventoryHold.objects.values_list("room", flat=True)), [other.id])
+
+
+@override_settings(PMS_RATE_LIMITS={"room_search": "2/m"}, PMS_RATE_LIMIT_IP_FACTOR=2)
+class ThrottleTest(SimpleTestCase):
+    def setUp(self):
+        throttle._store = throttle.LocalStore()
+        self.addCleanup(setattr, throttle, "_store", None)
+        self.view = throttle.rate_limit("room_search")(lambda request: "ok")
+
+    def request(self, session_key=None, **meta):
+        request = RequestFactory().get("/", **meta)
+        request.session = SessionStore(session_key)
+        return request
+
+    def test_rotating_sessions_does_not_reset_the_ip_limit(self):
+        codes = [getattr(self.view(self.request("session-%d" % i)), "status_code", 200) for i in range(6)]
+        self.assertEqual(codes, [200, 200, 200, 200, 429, 429])
+
+    def test_session_has_its_own_limit(self):
+        codes = [getattr(self.view(self.request("session-same")), "status_code", 200) for i in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+
+    @override_settings(PMS_TRUSTED_PROXIES=1)
+    def test_client_ip_behind_proxy(self):
+        request = self.request(HTTP_X_FORWARDED_FOR="6.6.6.6, 1.2.3.4", REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(throttle.client_ip(request), "1.2.3.4")
+
+
+class QueueTest(TestCase):
+    def setUp(self):
+        def fail(payload):
+            raise ValueError("boom")
+
+        queue.registry()
+        queue.task("test_fail", max_attempts=2)(fail)
+        queue.task("test_limited", concurrency=1)(lambda payload: None)
+        self.addCleanup(queue._tasks.pop, "test_fail")
+        self.addCleanup(queue._tasks.pop, "test_limited")
+
+    def test_backoff(self):
+        self.assertEqual([queue.backoff(n) for n in (1, 2, 3)], [5, 10, 20])
+        self.assertEqual(queue.backoff(30), queue.BACKOFF_MAX)
+
+    def test_retries_until_failed(self):
+        job = queue.enqueue("test_fail")
+        self.assertFalse(queue.run(queue.claim()))
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (Job.PENDING, 1))
+        self.assertGreater(job.run_at, timezone.now())
+        # not due before the backoff
+        self.assertIsNone(queue.claim())
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        queue.run(queue.claim())
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (Job.FAILED, 2))
+        self.assertIn("boom", job.last_error)
+
+    def test_enqueue_is_idempotent(self):
+        first = queue.enqueue("test_limited", {"n": 1}, key="same")
+        second = queue.enqueue("test_limited", {"n": 2}, key="same")
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_claim_respects_concurrency(self):
+        first = queue.enqueue("test_limited")
+        second = queue.enqueue("test_limited")
+        self.assertEqual(queue.claim().id, first.id)
+        self.assertIsNone(queue.claim())
+        self.assertTrue(queue.run(Job.objects.get(id=first.id)))
+        self.assertEqual(queue.claim().id, second.id)
+
+    def test_release_stale(self):
+        stale = queue.enqueue("test_limited")
+        busy = queue.enqueue("test_limited")
+        Job.objects.filter(id=stale.id).update(state=Job.RUNNING,
+                                               locked_at=timezone.now() - queue.STALE_AFTER - timedelta(minutes=1))
+        Job.objects.filter(id=busy.id).update(state=Job.RUNNING, locked_at=timezone.now())
+        self.assertEqual(queue.release_stale(), 1)
+        self.assertEqual(Job.objects.get(id=stale.id).state, Job.PENDING)
+        self.assertEqual(Job.objects.get(id=busy.id).state, Job.RUNNING)
+
+
+class MatcherTest(TestCase):
+    def setUp(self):
+        self.room_type = Room_type.objects.create(name="Doble", price=50, max_guests=2)
+        self.room = Room.objects.create(name="R1", description="", room_type=self.room_type)
+        self.start = date.today() + timedelta(days=10)
+
+    def wait(self, checkin, nights, guests=2, room_type=None):
+        checkin = self.start + timedelta(days=checkin)
+        return WaitlistEntry.objects.create(checkin=checkin, checkout=checkin + timedelta(days=nights), guests=guests,
+                                            room_type=room_type, name="W", email="w@w.com", phone="1").id
+
+    def match(self):
+        return matcher.match(self.room, self.start, self.start + timedelta(days=10))
+
+    def test_oldest_fitting_entry_wins_each_night(self):
+        first = self.wait(0, 3, room_type=self.room_type)
+        overlapping = self.wait(1, 2)
+        later = self.wait(5, 2)
+        too_big = self.wait(8, 1, guests=3)
+        self.assertEqual(self.match(), [first, later])
+        self.assertEqual(WaitlistEntry.objects.get(id=overlapping).state, WaitlistEntry.WAITING)
+        self.assertEqual(WaitlistEntry.objects.get(id=too_big).state, WaitlistEntry.WAITING)
+        self.assertEqual(WaitlistEntry.objects.get(id=first).room, self.room)
+
+    def test_booked_and_held_nights_are_not_offered(self):
+        booked = self.wait(0, 2)
+        held = self.wait(5, 2)
+        free = self.wait(9, 1)
+        Booking.objects.create(room=self.room, checkin=self.start + timedelta(days=1),
+                               checkout=self.start + timedelta(days=2), guests=1, total=1, code="T")
+        holds.acquire(self.room, self.start + timedelta(days=6), self.start + timedelta(days=7))
+        self.assertEqual(self.match(), [free])
+        self.assertEqual(WaitlistEntry.objects.filter(id__in=[booked, held], state=WaitlistEntry.WAITING).count(), 2)
@@ -0,0 +1,44 @@
+import threading
+
+from .throttle import get_store
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # concurrent calls with the same key share the result of the first one.
+    # Only threads of one process are coalesced (gunicorn --threads, see the Procfile).
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, key, compute):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            get_store().incr("coalesced")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = compute()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+
+searches = SingleFlight()
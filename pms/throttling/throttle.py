@@ -0,0 +1,180 @@
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+# local buckets kept before idle ones are dropped
+MAX_BUCKETS = 10000
+# takes between two prunes of the shared SQLite buckets (per process)
+PRUNE_EVERY = 1000
+
+
+def parse_rate(rate):
+    # "30/m" -> (30, 60): 30 requests every 60 seconds
+    count, period = rate.split("/")
+    return int(count), PERIODS[period[0]]
+
+
+def longest_period(default=60):
+    # a bucket idle for the longest configured period is full again whatever its scope
+    rates = getattr(settings, "PMS_RATE_LIMITS", {}).values()
+    return max((parse_rate(rate)[1] for rate in rates if rate), default=default)
+
+
+def refill(tokens, updated, now, count, period):
+    return min(count, tokens + (now - updated) * count / period)
+
+
+class LocalStore:
+    # token buckets and counters of this process
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.totals = {}
+
+    def take(self, key, count, period):
+        # returns 0 when the request is allowed, otherwise the seconds to wait
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (count, now))
+            tokens = refill(tokens, updated, now, count, period)
+            wait = 0 if tokens >= 1 else (1 - tokens) * period / count
+            self.buckets[key] = (tokens - 1 if not wait else tokens, now)
+            if len(self.buckets) > MAX_BUCKETS:
+                self.prune(now)
+        return wait
+
+    def prune(self, now):
+        # buckets idle for a whole period are full again, no need to keep them
+        period = longest_period()
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if now - bucket[1] < period}
+
+    def incr(self, name):
+        with self.lock:
+            self.totals[name] = self.totals.get(name, 0) + 1
+
+    def counters(self):
+        with self.lock:
+            return dict(self.totals)
+
+
+class SQLiteStore:
+    # token buckets and counters in a SQLite file shared by all the workers of the host
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+        self.takes = 0
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS bucket "
+                               "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS bucket_updated ON bucket (updated)")
+            connection.execute("CREATE TABLE IF NOT EXISTS counter "
+                               "(name TEXT PRIMARY KEY, total INTEGER NOT NULL)")
+            self.local.connection = connection
+        return connection
+
+    def take(self, key, count, period):
+        # wall clock, monotonic clocks are not comparable between processes
+        now = time.time()
+        connection = self.connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT tokens, updated FROM bucket WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (count, now)
+            tokens = refill(tokens, updated, now, count, period)
+            wait = 0 if tokens >= 1 else (1 - tokens) * period / count
+            connection.execute("INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)",
+                               (key, tokens - 1 if not wait else tokens, now))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        self.takes += 1
+        if self.takes % PRUNE_EVERY == 0:
+            self.prune(now)
+        return wait
+
+    def prune(self, now):
+        # one client per row would otherwise stay in the file forever
+        return self.connection().execute("DELETE FROM bucket WHERE updated < ?",
+                                         (now - longest_period(),)).rowcount
+
+    def incr(self, name):
+        self.connection().execute("INSERT INTO counter (name, total) VALUES (?, 1) "
+                                  "ON CONFLICT(name) DO UPDATE SET total = total + 1", (name,))
+
+    def counters(self):
+        return dict(self.connection().execute("SELECT name, total FROM counter"))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    # PMS_RATE_LIMIT_STORE is the path of the shared SQLite file, by default every process counts on its own
+    global _store
+    with _store_lock:
+        if _store is None:
+            path = getattr(settings, "PMS_RATE_LIMIT_STORE", None)
+            _store = SQLiteStore(path) if path else LocalStore()
+    return _store
+
+
+def client_ip(request):
+    # behind PMS_TRUSTED_PROXIES proxies REMOTE_ADDR is the last proxy, the client is the
+    # address those proxies appended to X-Forwarded-For (earlier entries can be forged)
+    proxies = getattr(settings, "PMS_TRUSTED_PROXIES", 0)
+    if proxies:
+        forwarded = [ip.strip() for ip in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if ip.strip()]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def client_keys(request):
+    # buckets a request is counted in, with the factor applied to the scope rate: the IP address
+    # always (new sessions are free to get, so rotating them must not reset the limit) with room
+    # for several clients behind one address, and the session when the request brought one
+    keys = [("ip:" + client_ip(request), getattr(settings, "PMS_RATE_LIMIT_IP_FACTOR", 1))]
+    session = getattr(request, "session", None)
+    if session is not None and session.session_key:
+        keys.append(("session:" + session.session_key, 1))
+    return keys
+
+
+def rate_limit(scope):
+    # limits a view to the rate configured for the scope in PMS_RATE_LIMITS, e.g. {"room_search": "30/m"}
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = getattr(settings, "PMS_RATE_LIMITS", {}).get(scope)
+            if not rate:
+                return view(request, *args, **kwargs)
+            count, period = parse_rate(rate)
+            store = get_store()
+            wait = 0
+            for key, factor in client_keys(request):
+                wait = store.take("%s:%s" % (scope, key), count * factor, period)
+                if wait:
+                    break
+            if wait:
+                store.incr("throttled")
+                store.incr("throttled:" + scope)
+                response = HttpResponse("Demasiadas solicitudes, inténtelo de nuevo más tarde", status=429)
+                response["Retry-After"] = str(int(wait) + 1)
+                return response
+            return view(request, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -6,10 +6,14 @@ urlpatterns = [
     path("", views.HomeView.as_view(), name="home"),
     path("search/room/", views.RoomSearchView.as_view(), name="search"),
     path("search/booking/", views.BookingSearchView.as_view(), name="booking_search"),
+    path("bookings/export/", views.BookingExportView.as_view(), name="booking_export"),
+    path("booking/group/", views.GroupBookingView.as_view(), name="group_booking"),
     path("booking/<str:pk>/", views.BookingView.as_view(), name="booking"),
     path("booking/<str:pk>/edit", views.EditBookingView.as_view(), name="edit_booking"),
     path("booking/<str:pk>/delete", views.DeleteBookingView.as_view(), name="delete_booking"),
+    path("waitlist/", views.WaitlistView.as_view(), name="waitlist"),
     path("rooms/", views.RoomsView.as_view(), name="rooms"),
     path("room/<str:pk>/", views.RoomDetailsView.as_view(), name="room_details"),
-    path("dashboard/", views.DashboardView.as_view(), name="dashboard")
+    path("dashboard/", views.DashboardView.as_view(), name="dashboard"),
+    path("calendar/", views.CalendarView.as_view(), name="calendar")
 ]
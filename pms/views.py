@@ -1,24 +1,38 @@
+from datetime import date, timedelta
+from urllib.parse import urlencode
+
 from django.db.models import F, Q, Count, Sum
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import ensure_csrf_cookie
 
+from .assignment import rooms as assignment
+from .availability import rooms as availability
 from .form_dates import Ymd
 from .forms import *
-from .models import Room
+from .holds import holds
+from .jobs import queue
+from .models import Room, Room_type
+from .projections import bookings as projection
 from .reservation_code import generate
+from .tenancy import context as tenancy
+from .throttling import coalesce, throttle
 
 
 class BookingSearchView(View):
     # renders search results for bookingings
+    @method_decorator(throttle.rate_limit('booking_search'))
     def get(self, request):
         query = request.GET.dict()
         if (not "filter" in query):
             return redirect("/")
-        bookings = (Booking.objects
-                    .filter(Q(code__icontains=query['filter']) | Q(customer__name__icontains=query['filter']))
-                    .order_by("-created"))
+        key = ('booking_search', request.property.id if request.property else None, query['filter'])
+        bookings = coalesce.searches.do(key, lambda: list(projection.iter_rows(
+            Booking.objects
+            .filter(Q(code__icontains=query['filter']) | Q(customer__name__icontains=query['filter']))
+            .order_by("-created"))))
         room_search_form = RoomSearchForm()
         context = {
             'bookings': bookings,
@@ -39,6 +53,7 @@ class RoomSearchView(View):
         return render(request, "booking_search_form.html", context)
 
     # renders the search results of available rooms by date and guests
+    @method_decorator(throttle.rate_limit('room_search'))
     def post(self, request):
         query = request.POST.dict()
         # calculate number of days in the hotel
@@ -49,23 +64,23 @@ class RoomSearchView(View):
         filters = {
             'room_type__max_guests__gte': query['guests']
         }
-        exclude = {
-            'booking__checkin__lte': query['checkout'],
-            'booking__checkout__gte': query['checkin'],
-            'booking__state__exact': "NEW"
-        }
-        rooms = (Room.objects
-                 .filter(**filters)
-                 .exclude(**exclude)
-                 .annotate(total=total_days * F('room_type__price'))
-                 .order_by("room_type__max_guests", "name")
-                 )
-        total_rooms = (Room.objects
-                       .filter(**filters)
-                       .values("room_type__name", "room_type")
-                       .exclude(**exclude)
-                       .annotate(total=Count('room_type'))
-                       .order_by("room_type__max_guests"))
+
+        def search():
+            rooms = (availability.free_rooms(query['checkin'], query['checkout'], **filters)
+                     .select_related('room_type')
+                     .annotate(total=total_days * F('room_type__price'))
+                     .order_by("room_type__max_guests", "name")
+                     )
+            total_rooms = availability.free_by_type(query['checkin'], query['checkout'], **filters)
+            # the room of each type that leaves the least fragmented calendar
+            recommended = assignment.recommend(availability.free_rooms(query['checkin'], query['checkout'], **filters),
+                                               checkin.date.date(), checkout.date.date())
+            return list(rooms), list(total_rooms), list(recommended.values())
+
+        # identical searches running at the same time share one computation
+        key = ('room_search', request.property.id if request.property else None,
+               query['checkin'], query['checkout'], query['guests'])
+        rooms, total_rooms, recommended = coalesce.searches.do(key, search)
         # prepare context data for template
         data = {
             'total_days': total_days
@@ -77,41 +92,77 @@ class RoomSearchView(View):
             "total_rooms": total_rooms,
             "query": query,
             "url_query": url_query,
+            "recommended": recommended,
             "data": data
         }
+        if not total_rooms:
+            # nothing free: the guest can wait for a cancellation
+            context["waitlist_form"] = WaitlistForm(initial=query)
         return render(request, "search.html", context)
 
 
 class HomeView(View):
     # renders home page with all the bookingings order by date of creation
     def get(self, request):
-        bookings = Booking.objects.all().order_by("-created")
+        bookings = list(projection.iter_rows(Booking.objects.all().order_by("-created")))
         context = {
             'bookings': bookings
         }
         return render(request, "home.html", context)
 
 
+class BookingExportView(View):
+    # streams the bookings (optionally filtered like the booking search) as CSV or JSON
+    def get(self, request):
+        query = request.GET.dict()
+        # the body is streamed after the middleware left the property scope, so the
+        # database alias is pinned here (the property filter is already applied)
+        bookings = Booking.objects.using(tenancy.database()).order_by("-created")
+        if query.get('filter'):
+            bookings = bookings.filter(Q(code__icontains=query['filter']) | Q(customer__name__icontains=query['filter']))
+        rows = projection.iter_rows(bookings)
+        if query.get('format') == 'json':
+            return StreamingHttpResponse(projection.iter_json(rows), content_type='application/json')
+        response = StreamingHttpResponse(projection.iter_csv(rows), content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="bookings.csv"'
+        return response
+
+
 class BookingView(View):
     @method_decorator(ensure_csrf_cookie)
     def post(self, request, pk):
         # check if customer form is ok
         customer_form = CustomerForm(request.POST, prefix="customer")
         if customer_form.is_valid():
-            # save customer data
-            customer = customer_form.save()
-            # add the customer id to the booking form
+            # add the room and code to the booking form
             temp_POST = request.POST.copy()
             temp_POST.update({
-                'booking-customer': customer.id,
                 'booking-room': pk,
                 'booking-code': generate.get()})
             # if ok, save booking data
             booking_form = BookingForm(temp_POST, prefix="booking")
+            # the customer is only stored together with the booking, see holds.convert
+            booking_form.fields['customer'].required = False
             if booking_form.is_valid():
-                booking_form.save()
+                # the hold taken when the form was opened becomes the booking
+                try:
+                    booking = holds.convert(request.POST.get("hold"), booking_form, customer_form.cleaned_data)
+                except holds.Unavailable:
+                    data = booking_form.cleaned_data
+                    context = {
+                        "url_query": urlencode({"checkin": data['checkin'], "checkout": data['checkout'],
+                                                "guests": data['guests']}),
+                        "room": data['room'],
+                        "unavailable": True
+                    }
+                    return render(request, "booking.html", context, status=409)
+                request.session.pop("hold", None)
+                # confirmation and other side work run in the job worker
+                queue.enqueue_on_commit("booking_created", {"booking": booking.id},
+                                        key="booking_created:%s" % booking.id)
         return redirect('/')
 
+    @method_decorator(throttle.rate_limit('booking_form'))
     def get(self, request, pk):
         # renders the form for booking confirmation.
         # It returns 2 forms, the one with the booking info is hidden
@@ -125,17 +176,104 @@ class BookingView(View):
         total = total_days * room.room_type.price  # total amount to be paid
         query['total'] = total
         url_query = request.GET.urlencode()
+        # the room is held for this visitor while the form is filled, reloading extends the hold.
+        # A session holds one room at a time, opening another room gives the previous one back
+        key = "%s:%s:%s" % (pk, query['checkin'], query['checkout'])
+        previous_key, token = request.session.get("hold", (None, None))
+        if token and previous_key != key:
+            holds.release(token)
+            token = None
+            del request.session["hold"]
+        hold = holds.acquire(room, checkin.date.date(), checkout.date.date(), token)
+        if hold is None:
+            context = {
+                "url_query": url_query,
+                "room": room,
+                "unavailable": True
+            }
+            return render(request, "booking.html", context, status=409)
+        request.session["hold"] = (key, hold.token)
         booking_form = BookingFormExcluded(prefix="booking", initial=query)
         customer_form = CustomerForm(prefix="customer")
         context = {
             "url_query": url_query,
             "room": room,
+            "hold": hold,
             "booking_form": booking_form,
             "customer_form": customer_form
         }
         return render(request, "booking.html", context)
 
 
+class GroupBookingView(View):
+    # renders the free rooms per room type so several rooms can be booked at once
+    def get(self, request):
+        search_form = GroupSearchForm(request.GET or None)
+        context = {
+            "form": search_form
+        }
+        if search_form.is_valid():
+            context.update(self.availability(request.GET.dict()))
+            context["customer_form"] = CustomerForm(prefix="customer")
+        return render(request, "group_booking.html", context)
+
+    # books the whole room mix in one transaction
+    @method_decorator(ensure_csrf_cookie)
+    def post(self, request):
+        from .group_booking import reserve
+
+        query = request.POST.dict()
+        search_form = GroupSearchForm(request.POST)
+        customer_form = CustomerForm(request.POST, prefix="customer")
+        if not (search_form.is_valid() and customer_form.is_valid()):
+            return redirect("group_booking")
+        mix = {}
+        for key, value in query.items():
+            room_type = key[len("type-"):]
+            if key.startswith("type-") and room_type.isdigit() and value.isdigit():
+                mix[int(room_type)] = int(value)
+        # only the room types of the current property can be booked
+        known = set(Room_type.objects.filter(id__in=list(mix)).values_list("id", flat=True))
+        if not any(mix.values()) or not known.issuperset(mix):
+            return redirect("group_booking")
+        try:
+            bookings = reserve.reserve(query["checkin"], query["checkout"], mix, customer_form.cleaned_data)
+        except reserve.Shortfall as shortfall:
+            context = {
+                "form": search_form,
+                "customer_form": customer_form,
+                "missing": shortfall.missing,
+                "requested": mix
+            }
+            context.update(self.availability(query))
+            return render(request, "group_booking.html", context)
+        for booking in bookings:
+            queue.enqueue_on_commit("booking_created", {"booking": booking.id},
+                                    key="booking_created:%s" % booking.id)
+        return redirect("/")
+
+    def availability(self, query):
+        total_days = Ymd.Ymd(query['checkout']) - Ymd.Ymd(query['checkin'])
+        total_rooms = availability.free_by_type(query['checkin'], query['checkout'])
+        return {
+            "total_rooms": total_rooms,
+            "query": query,
+            "data": {
+                "total_days": total_days
+            }
+        }
+
+
+class WaitlistView(View):
+    # registers a stay request for dates without availability
+    @method_decorator(ensure_csrf_cookie)
+    def post(self, request):
+        waitlist_form = WaitlistForm(request.POST)
+        if waitlist_form.is_valid():
+            waitlist_form.save()
+        return redirect("/")
+
+
 class DeleteBookingView(View):
     # renders the booking deletion form
     def get(self, request, pk):
@@ -147,7 +285,18 @@ class DeleteBookingView(View):
 
     # deletes the booking
     def post(self, request, pk):
-        Booking.objects.filter(id=pk).update(state="DEL")
+        cancelled = Booking.objects.filter(id=pk).exclude(state="DEL").update(state="DEL")
+        if cancelled:
+            queue.enqueue_on_commit("booking_cancelled", {"booking": int(pk)},
+                                    key="booking_cancelled:%s" % pk)
+            booking = Booking.objects.get(id=pk)
+            if booking.room_id is not None:
+                # the freed room-nights are offered to the waitlist
+                queue.enqueue_on_commit("waitlist_release", {
+                    "room": booking.room_id,
+                    "checkin": booking.checkin.isoformat(),
+                    "checkout": booking.checkout.isoformat()
+                })
         return redirect("/")
 
 
@@ -171,6 +320,7 @@ class EditBookingView(View):
         customer_form = CustomerForm(request.POST, prefix="customer", instance=booking.customer)
         if customer_form.is_valid():
             customer_form.save()
+            queue.enqueue_on_commit("booking_updated", {"booking": booking.id})
             return redirect("/")
 
 
@@ -209,12 +359,25 @@ class DashboardView(View):
                     .aggregate(Sum('total'))
                     )
 
+        # expected occupancy and revenue per room type, see refresh_forecast
+        forecast = (Room_type.objects
+                    .annotate(expected_rooms=Sum('forecast__expected_rooms'),
+                              expected_revenue=Sum('forecast__expected_revenue'),
+                              days=Count('forecast'))
+                    .filter(days__gt=0)
+                    .order_by('max_guests'))
+        rooms = dict(Room.objects.values_list('room_type').annotate(Count('id')).order_by())
+        for room_type in forecast:
+            capacity = rooms.get(room_type.id, 0) * room_type.days
+            room_type.occupancy = 100 * room_type.expected_rooms / capacity if capacity else 0
+
         # preparing context data
         dashboard = {
             'new_bookings': new_bookings,
             'incoming_guests': incoming,
             'outcoming_guests': outcoming,
-            'invoiced': invoiced
+            'invoiced': invoiced,
+            'forecast': forecast
 
         }
 
@@ -244,3 +407,33 @@ class RoomsView(View):
             'rooms': rooms
         }
         return render(request, "rooms.html", context)
+
+
+class CalendarView(View):
+    # free rooms per room type and occupancy per room for every night of a date range
+    MAX_NIGHTS = 366
+
+    def get(self, request):
+        import csv
+        from .availability import calendar
+
+        query = request.GET.dict()
+        try:
+            start = Ymd.Ymd(query.get('start')).date.date() if query.get('start') else date.today()
+            end = Ymd.Ymd(query['end']).date.date() if query.get('end') else start + timedelta(days=30)
+            room_type = int(query['room_type']) if query.get('room_type') else None
+        except ValueError:
+            return JsonResponse({'error': 'invalid start, end or room_type'}, status=400)
+        if end < start or (end - start).days >= self.MAX_NIGHTS:
+            return JsonResponse({'error': 'the range must be between 1 and %d nights' % self.MAX_NIGHTS}, status=400)
+
+        grid = calendar.build(start, end, room_type)
+        output = query.get('format', 'json')
+        if output == 'csv':
+            response = HttpResponse(content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="calendar-%s.csv"' % start
+            csv.writer(response).writerows(grid.csv_rows())
+            return response
+        if output == 'bin':
+            return HttpResponse(grid.as_bytes(), content_type='application/octet-stream')
+        return JsonResponse(grid.as_dict())
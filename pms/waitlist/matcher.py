@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+from django.db.models import Q
+
+from ..holds import holds
+from ..models import Booking, WaitlistEntry
+
+# longest stay accepted on the waitlist, it bounds the index range scanned on every release
+MAX_NIGHTS = 30
+
+
+def candidates(room, checkin, checkout):
+    # waiting entries that overlap the freed dates and fit in the room, oldest first
+    earliest = max(date.today(), checkin - timedelta(days=MAX_NIGHTS))
+    fits = Q(room_type=room.room_type_id)
+    if room.room_type is not None:
+        fits |= Q(room_type__isnull=True, guests__lte=room.room_type.max_guests)
+    return (WaitlistEntry.objects
+            .filter(fits,
+                    property=room.property_id,
+                    state=WaitlistEntry.WAITING,
+                    checkin__gte=earliest,
+                    checkin__lte=checkout,
+                    checkout__gte=checkin)
+            .order_by("created", "id"))
+
+
+def match(room, checkin, checkout):
+    # ids of the entries that can now stay in the room released between checkin and checkout
+    entries = list(candidates(room, checkin, checkout).values_list("id", "checkin", "checkout"))
+    if not entries:
+        return []
+    first = min(entry_checkin for _, entry_checkin, _ in entries)
+    last = max(entry_checkout for _, _, entry_checkout in entries)
+    busy = list(Booking.objects
+                .filter(room=room, state=Booking.NEW, checkin__lte=last, checkout__gte=first)
+                .values_list("checkin", "checkout"))
+    # a guest filling the booking form of the room keeps it, as in the room search
+    busy += holds.blocking(first, last).filter(room=room).values_list("checkin", "checkout")
+    matched = []
+    for entry, entry_checkin, entry_checkout in entries:
+        # same overlap rule as the room search
+        if any(start <= entry_checkout and end >= entry_checkin for start, end in busy):
+            continue
+        matched.append(entry)
+        # the room is offered to one entry per night
+        busy.append((entry_checkin, entry_checkout))
+    if matched:
+        WaitlistEntry.objects.filter(id__in=matched).update(state=WaitlistEntry.MATCHED, room=room)
+    return matched